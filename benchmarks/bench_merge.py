@@ -0,0 +1,53 @@
+"""Compares merging config chains with `|` against single-pass `merge_configs`.
+
+Usage: PYTHONPATH=. python benchmarks/bench_merge.py [--depths 2 8 32] [--list-sizes 1 10 100]
+"""
+import argparse
+import time
+from functools import reduce
+
+from devcontainer_manager.config import Config
+from devcontainer_manager.merge import merge_configs
+
+
+def make_chain(depth: int, list_size: int):
+    configs = []
+    for i in range(depth):
+        config = Config()
+        config.devcontainer.extensions = [f"ext-{i}-{j}" for j in range(list_size)]
+        config.devcontainer.run_args = [f"--arg-{i}-{j}" for j in range(list_size)]
+        config.devcontainer.image = f"image-{i}"
+        configs.append(config)
+    return configs
+
+
+def timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--list-sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'depth':>6} {'list':>6} {'reduce |':>12} {'merge_configs':>14} {'speedup':>8}")
+    for depth in args.depths:
+        for list_size in args.list_sizes:
+            configs = make_chain(depth, list_size)
+            pairwise = timeit(lambda: reduce(lambda a, b: a | b, configs), args.repeat)
+            single = timeit(lambda: merge_configs(configs), args.repeat)
+            print(
+                f"{depth:>6} {list_size:>6} {pairwise * 1000:>10.2f}ms {single * 1000:>12.2f}ms"
+                f" {pairwise / single:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Benchmarks of config parsing, merging, resolving and rendering on synthetic template libraries.
+
+Every scenario from `synthetic.SCENARIOS` is generated into a temporary directory and each
+stage is measured separately - the best wall time of `--repeat` runs and peak memory allocated
+by the stage (measured in an extra run under tracemalloc). Runs offline, no docker is needed.
+
+Usage (from the repository root, `PYTHONPATH=.` is not needed if the package is installed):
+    PYTHONPATH=. python benchmarks/run.py                    # print results
+    PYTHONPATH=. python benchmarks/run.py --save-baseline    # store results in baseline.json
+    PYTHONPATH=. python benchmarks/run.py --compare          # compare, exit 1 on regression
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from synthetic import SCENARIOS, Scenario, generate_library
+
+from devcontainer_manager import renderer
+from devcontainer_manager.alias import AliasConfig
+from devcontainer_manager.config import Config
+from devcontainer_manager.graph import ConfigGraph
+from devcontainer_manager.layered import ConfigLayer, LayeredConfig
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+
+def measure(fn: Callable, repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time_ms": best * 1000, "peak_kib": peak / 1024}
+
+
+def run_scenario(scenario: Scenario, repeat: int) -> Dict[str, Dict[str, float]]:
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        project = generate_library(directory, scenario)
+        alias_config = AliasConfig(config_path=directory / "aliases.yaml")
+
+        def parse():
+            graph = ConfigGraph(Config, alias_config)
+            graph.chain(project)
+            return graph
+
+        parsed = parse()
+
+        def merge():
+            graph = ConfigGraph(Config, alias_config)
+            graph.nodes = dict(parsed.nodes)
+            layers = [
+                ConfigLayer(node.path.as_posix(), node.config.layer())
+                for node in graph.chain(project)
+            ]
+            return LayeredConfig(layers).config
+
+        merged = merge()
+        resolved = merged.resolve()
+
+        def render():
+            for output in renderer.render(resolved).values():
+                for _ in renderer.output_content(output):
+                    pass
+
+        return {
+            "parse": measure(parse, repeat),
+            "merge": measure(merge, repeat),
+            "resolve": measure(merged.resolve, repeat),
+            "render": measure(render, repeat),
+        }
+
+
+def run(scenarios: List[Scenario], repeat: int) -> Results:
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = run_scenario(scenario, repeat)
+        print_results({scenario.name: results[scenario.name]})
+    return results
+
+
+def print_results(results: Results, baseline: Results = None):
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            line = (
+                f"{name:>18} {stage:>8} "
+                f"{result['time_ms']:>10.2f}ms {result['peak_kib']:>10.1f}KiB"
+            )
+            if baseline and stage in baseline.get(name, {}):
+                base = baseline[name][stage]
+                line += (
+                    f"   time {_ratio(result['time_ms'], base['time_ms'])}"
+                    f"   memory {_ratio(result['peak_kib'], base['peak_kib'])}"
+                )
+            print(line)
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> List[str]:
+    """Returns descriptions of stages that are slower or use more memory than the baseline by
+    more than `threshold` (relative)."""
+    regressions = []
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            base = baseline.get(name, {}).get(stage)
+            if base is None:
+                continue
+            for metric in ["time_ms", "peak_kib"]:
+                if result[metric] > base[metric] * (1 + threshold):
+                    regressions.append(
+                        f"{name}/{stage}: {metric} {base[metric]:.2f} -> {result[metric]:.2f}"
+                    )
+    return regressions
+
+
+def _ratio(value: float, base: float) -> str:
+    return f"{value / base:>5.2f}x" if base else "   n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenario", action="append", help="run only selected scenarios")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="relative slowdown treated as regression"
+    )
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    print(f"{'scenario':>18} {'stage':>8} {'time':>12} {'peak memory':>13}")
+    results = run(scenarios, args.repeat)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=4) + "\n")
+        print(f"\nBaseline written to '{args.baseline}'")
+
+    if args.compare:
+        baseline = json.loads(args.baseline.read_text())
+        print("\nCompared to baseline:")
+        print_results(results, baseline)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Generators of synthetic template libraries for benchmarks."""
+from pathlib import Path
+from typing import List, NamedTuple
+
+
+class Scenario(NamedTuple):
+    name: str
+    # number of inheritance levels between root template and project overrides
+    depth: int = 2
+    # number of templates on every level, each based on all templates of the previous level
+    fan_in: int = 1
+    # number of mounts, run_args, extensions and additional_commands in every template
+    list_size: int = 2
+    # length of chain of additional_commands where each command references the previous one
+    reference_chain: int = 0
+    # number of lines in base dockerfile
+    dockerfile_lines: int = 10
+
+
+SCENARIOS = [
+    Scenario("small"),
+    Scenario("deep", depth=16),
+    Scenario("diamond", depth=4, fan_in=3),
+    Scenario("wide-lists", list_size=200),
+    Scenario("reference-chain", reference_chain=100),
+    Scenario("large-dockerfile", dockerfile_lines=5000),
+    Scenario("everything", depth=6, fan_in=2, list_size=50, reference_chain=30),
+]
+
+
+def _yaml_list(key: str, items: List[str], indent: int = 4) -> List[str]:
+    if not items:
+        return []
+    prefix = " " * indent
+    return [f"{prefix}{key}:", *(f"{prefix}  - '{item}'" for item in items)]
+
+
+def _template(
+    name: str,
+    bases: List[str],
+    scenario: Scenario,
+    dockerfile: Path,
+    extra_commands: List[str] = (),
+) -> str:
+    n = scenario.list_size
+    lines = []
+    if bases:
+        lines.append("base_config:")
+        lines.extend(f"  - {base}" for base in bases)
+
+    lines.append("devcontainer:")
+    lines.extend(_yaml_list("mounts", [f"/src/{name}/{i}:/mnt/{name}/{i}" for i in range(n)]))
+    lines.extend(_yaml_list("run_args", [f"--env={name.upper()}_{i}=1" for i in range(n)]))
+    lines.extend(_yaml_list("extensions", [f"publisher.{name}-{i}" for i in range(n)]))
+
+    lines.append("docker:")
+    lines.append(f"    file: {dockerfile.as_posix()}")
+    commands = [*extra_commands, *(f"RUN echo {name} {i}" for i in range(n))]
+    lines.extend(_yaml_list("additional_commands", commands))
+    return "\n".join(lines) + "\n"
+
+
+def generate_library(directory: Path, scenario: Scenario) -> Path:
+    """Writes template library for `scenario` into `directory` and returns path of project
+    overrides config that is based on the whole library."""
+    templates = directory / "templates"
+    templates.mkdir(parents=True, exist_ok=True)
+
+    dockerfile = directory / "Dockerfile"
+    dockerfile.write_text(
+        "FROM ubuntu:22.04\n"
+        + "".join(f"RUN echo line {i}\n" for i in range(scenario.dockerfile_lines))
+    )
+
+    # root is the first config in merge order, so indices of its commands are not shifted
+    chain = []
+    if scenario.reference_chain:
+        chain = ["ENV V0=0"]
+        chain.extend(
+            f"ENV V{i}={{{{ docker.additional_commands[{i - 1}] | length }}}}"
+            for i in range(1, scenario.reference_chain + 1)
+        )
+    (templates / "root.yaml").write_text(_template("root", [], scenario, dockerfile, chain))
+    previous = ["root.yaml"]
+    for level in range(1, scenario.depth + 1):
+        current = []
+        for i in range(scenario.fan_in):
+            name = f"level{level}-{i}"
+            (templates / f"{name}.yaml").write_text(
+                _template(name.replace("-", "_"), previous, scenario, dockerfile)
+            )
+            current.append(f"{name}.yaml")
+        previous = current
+
+    project = directory / "project" / ".devcontainer" / "overrides.yaml"
+    project.parent.mkdir(parents=True, exist_ok=True)
+    bases = [(templates / name).as_posix() for name in previous]
+    content = _template("project", bases, scenario, dockerfile)
+    project.write_text(content)
+    return project
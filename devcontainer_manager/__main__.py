@@ -1,5 +1,19 @@
 #!/usr/bin/env python3
-from .cli.cli import main
+import sys
+
+
+def main():
+    # forwarding to the daemon imports only the standard library
+    from .daemon import forward
+
+    exit_code = forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from .cli.cli import main
+
+    main()
+
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,20 @@
-from functools import reduce
 from pathlib import Path
-from typing import TYPE_CHECKING, Iterable, List, Optional, Type, TypeVar, Union
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Type, TypeVar, Union
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError, validator
 from pydantic.fields import ModelField
 from pydantic_yaml import YamlModel
 
-from .util import dict_merge, render_recursive_template
-from .yaml import yaml
+from .cache import get_snapshot_cache
+from .graph import ConfigGraph
+from .merge import Layer, RemoveList, ReplaceList, merge_configs
+from .resolver import render_template_values
+from .util import write_if_changed
+from .yaml import load_str, yaml
 
 if TYPE_CHECKING:
+    from .alias import AliasConfig
+
     Model = TypeVar("Model", bound="BaseModel")
 
 
@@ -25,13 +30,40 @@ def default_if_none(cls, v, field: ModelField):
 
 class BaseYamlConfigModel(YamlModel):
     config_path: Path = Field(Path(".").absolute(), exclude=True)
+    # `!replace` and `!remove` lists by field name, applied when this config is merged
+    _list_markers: Dict[str, list] = PrivateAttr(default_factory=dict)
+
+    class Config:
+        yaml_loads = load_str
+
+    def __init__(self, **data):
+        markers = {}
+        for name, value in data.items():
+            if isinstance(value, RemoveList):
+                # removes items only from other configs, on its own the list is empty
+                markers[name] = value
+                data[name] = []
+            elif isinstance(value, ReplaceList):
+                markers[name] = ReplaceList()
+        super().__init__(**data)
+
+        for name, marker in markers.items():
+            if isinstance(marker, RemoveList) and marker:
+                value, errors = self.__fields__[name].validate(
+                    list(marker), {}, loc=name, cls=type(self)
+                )
+                if errors:
+                    raise ValidationError([errors], type(self))
+                markers[name] = RemoveList(value)
+        self._list_markers = markers
 
     def __or__(self, other: "Model") -> "Model":
-        return type(self).parse_obj(
-            dict_merge(
-                self.dict(exclude={"config_path": {}}, exclude_defaults=True),
-                other.dict(exclude={"config_path": {}}, exclude_defaults=True),
-            )
+        return merge_configs([self, other], type(self))
+
+    def layer(self) -> Layer:
+        """Returns values explicitly set in this config for merging with other configs."""
+        return _with_list_markers(
+            self, self.dict(exclude={"config_path": {}}, exclude_defaults=True)
         )
 
     @classmethod
@@ -41,12 +73,21 @@ class BaseYamlConfigModel(YamlModel):
         resolve: bool = False,
         **kwargs,
     ) -> "Model":
+        snapshot_cache = get_snapshot_cache()
+        key = None
+        if snapshot_cache is not None and not kwargs:
+            key = snapshot_cache.key(cls, path, resolve)
+            obj = key and snapshot_cache.lookup(key)
+            if obj is not None:
+                return obj
+
         obj = super(BaseYamlConfigModel, cls).parse_file(path, **kwargs)
         if resolve:
-            resolved = render_recursive_template(obj.json(), obj.dict())
-            obj = cls.parse_raw(resolved)
+            obj = cls.parse_obj(render_template_values(obj.dict()))
 
         obj.config_path = Path(path).absolute()
+        if key is not None:
+            snapshot_cache.store(key, obj)
         return obj
 
     def yaml(self, with_descriptions=False, **dict_kwargs):
@@ -57,18 +98,36 @@ class BaseYamlConfigModel(YamlModel):
             yaml_dict = self.dict(**dict_kwargs)
         return yaml.dump_str(yaml_dict)
 
-    def write_yaml(self, path: Path = None, create_parents: bool = True, **yaml_kwargs):
+    def write_yaml(self, path: Path = None, create_parents: bool = True, **yaml_kwargs) -> bool:
         if path is None:
             path = self.config_path
         if create_parents:
             path.parent.mkdir(exist_ok=True, parents=True)
-        path.write_text(self.yaml(**yaml_kwargs))
+        return write_if_changed(path, self.yaml(**yaml_kwargs))
 
     @classmethod
     def none(cls: Type["Model"]) -> "Model":
         return cls.construct(**{field: None for field in cls.__fields__})
 
 
+def _with_list_markers(model: BaseYamlConfigModel, values: dict) -> dict:
+    """Wraps lists in `values` of `model` (and its nested configs) that were marked by
+    `!replace` or `!remove`, so that they are merged accordingly."""
+    # configs restored from snapshots of older versions have no markers
+    for name, marker in (getattr(model, "_list_markers", None) or {}).items():
+        if isinstance(marker, ReplaceList):
+            values[name] = ReplaceList(values.get(name, getattr(model, name)))
+        else:
+            values[name] = marker
+    for name in model.__fields__:
+        child = getattr(model, name)
+        if isinstance(child, BaseYamlConfigModel):
+            child_values = _with_list_markers(child, values.get(name) or {})
+            if child_values:
+                values[name] = child_values
+    return values
+
+
 class BaseYamlConfigModelWithBase(BaseYamlConfigModel):
     base_config: Optional[List[Path]] = Field(default_factory=list)
 
@@ -84,11 +143,7 @@ class BaseYamlConfigModelWithBase(BaseYamlConfigModel):
             return [v]
         raise ValueError(f"invalid value for base_config: '{v}'")
 
-    def merge_bases(self):
-        from .global_config import GlobalConfig
-
-        alias_config = GlobalConfig.load().load_alias_config()
-
+    def base_config_paths(self, alias_config: "AliasConfig") -> List[Path]:
         base_configs = []
         for config_path in self.base_config:
             resolved_config_path = None
@@ -100,15 +155,15 @@ class BaseYamlConfigModelWithBase(BaseYamlConfigModel):
                 resolved_config_path = self.config_path.parent / config_path
 
             base_configs.append(resolved_config_path)
+        return base_configs
+
+    def merge_bases(self, graph: "ConfigGraph" = None):
+        if graph is None:
+            from .context import get_context
 
-        base_configs = [
-            type(self).parse_file(config_path).merge_bases() for config_path in base_configs
-        ]
-        if not base_configs:
-            return self
+            graph = ConfigGraph(type(self), get_context().alias_config)
 
-        bases_merged = reduce(lambda a, b: a | b, base_configs)
-        return bases_merged | self
+        return graph.merge(self)
 
 
 def _construct_yaml_dict_with_comments(cls, d, column=0):
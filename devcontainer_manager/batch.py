@@ -0,0 +1,171 @@
+import json
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from . import renderer, timing
+from .generator import Generator
+from .util import working_directory
+
+
+class ProjectResult(NamedTuple):
+    project_dir: Path
+    status: str
+    duration: float
+    message: str = ""
+    spans: List[timing.Span] = []
+
+
+def find_projects(paths: List[Path], overrides_path: Path) -> List[Path]:
+    """Returns project directories for `paths`.
+
+    Each path can be either a project directory, a directory whose subdirectories are projects
+    (only those containing overrides config are used) or a manifest file with one project
+    directory per line, relative to the manifest.
+    """
+    projects = []
+    for path in paths:
+        if path.is_file():
+            for line in path.read_text().splitlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    projects.append(path.parent / line)
+        elif (path / overrides_path).exists():
+            projects.append(path)
+        else:
+            projects.extend(sorted(p for p in path.iterdir() if (p / overrides_path).exists()))
+    return [p.resolve() for p in projects]
+
+
+_generator: Optional[Generator] = None
+
+
+def _init_worker(generator: Generator):
+    global _generator
+    _generator = generator
+
+
+def _generate_project(
+    project_dir: Path, templates: Optional[List[str]], build: bool
+) -> ProjectResult:
+    start = time.perf_counter()
+    with timing.capture() as spans:
+        try:
+            with working_directory(project_dir):
+                result = _generator.generate(templates)
+                # images with bake files are built together by `bake_projects`
+                if build and not renderer.DOCKER_BAKE.exists():
+                    _generator.build()
+        except Exception as e:
+            return ProjectResult(project_dir, "failed", time.perf_counter() - start, str(e), spans)
+
+    status = "up to date" if result.up_to_date else "generated"
+    return ProjectResult(project_dir, status, time.perf_counter() - start, spans=spans)
+
+
+def generate_projects(
+    generator: Generator,
+    projects: List[Path],
+    templates: Optional[List[str]] = None,
+    build: bool = False,
+    jobs: Optional[int] = None,
+) -> Iterator[ProjectResult]:
+    """Generates all `projects` using `jobs` worker processes, yielding results in order.
+
+    Configs of all projects are loaded through the generator graph before the workers are
+    started, so base configs shared by projects are parsed only once. Spans recorded while
+    generating a project are returned in its result.
+    """
+    for project_dir in projects:
+        with working_directory(project_dir):
+            try:
+                generator.merge(templates)
+            except Exception:
+                # errors are reported for the project when it is generated
+                pass
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(projects) <= 1:
+        _init_worker(generator)
+        for project_dir in projects:
+            yield _generate_project(project_dir, templates, build)
+        return
+
+    mp_context = None
+    if "fork" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("fork")
+
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(projects)),
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(generator,),
+    ) as executor:
+        yield from executor.map(
+            _generate_project, projects, [templates] * len(projects), [build] * len(projects)
+        )
+
+
+def _image_fingerprint(image: str) -> Optional[str]:
+    label = json.dumps(renderer.FINGERPRINT_LABEL)
+    result = subprocess.run(
+        [
+            "docker",
+            "image",
+            "inspect",
+            "--format",
+            f"{{{{ index .Config.Labels {label} }}}}",
+            image,
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def bake_targets(project_dirs: List[Path], force: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Returns bake targets of `project_dirs` whose images are not up to date (all if `force`)
+    with paths made absolute, target names are made unique by appending a number."""
+    targets = {}
+    for project_dir in project_dirs:
+        bake_path = project_dir / renderer.DOCKER_BAKE
+        if not bake_path.exists():
+            continue
+        for name, target in json.loads(bake_path.read_text())["target"].items():
+            fingerprint = target.get("labels", {}).get(renderer.FINGERPRINT_LABEL)
+            if not force and all(
+                _image_fingerprint(tag) == fingerprint for tag in target.get("tags", [])
+            ):
+                continue
+            target = dict(target)
+            target["context"] = (project_dir / target.get("context", ".")).as_posix()
+            target["dockerfile"] = (project_dir / target["dockerfile"]).as_posix()
+            unique_name, i = name, 1
+            while unique_name in targets:
+                i += 1
+                unique_name = f"{name}-{i}"
+            targets[unique_name] = target
+    return targets
+
+
+def bake_projects(project_dirs: List[Path], force: bool = False) -> List[str]:
+    """Builds images of projects that have bake files with a single `docker buildx bake`, so
+    that buildkit builds them in parallel and shares cache between them. Returns names of
+    built targets."""
+    targets = bake_targets(project_dirs, force)
+    if not targets:
+        return []
+
+    bake = {"group": {"default": {"targets": list(targets)}}, "target": targets}
+    with tempfile.TemporaryDirectory() as directory:
+        bake_path = Path(directory) / "docker-bake.json"
+        bake_path.write_text(json.dumps(bake, indent=4))
+        with timing.span("build"):
+            subprocess.run(["docker", "buildx", "bake", "-f", bake_path.as_posix()], check=True)
+    return list(targets)
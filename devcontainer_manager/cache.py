@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
+
+from . import __version__
+from .settings import Settings
+
+
+def file_hash(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return None
+
+
+def _json_value(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0
+
+
+class GenerateCache:
+    """On-disk cache of `generate` runs.
+
+    Each entry is stored under a key derived from the invocation (working directory and
+    template arguments) and records content hashes of every input file of the run (all configs
+    in the base chain, global config, alias config and dockerfile), values of global variables
+    used by the templates and hashes of generated outputs. An entry is a hit only if all of
+    these are unchanged.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "GenerateCache":
+        return cls(settings.cache_dir, settings.cache_max_entries)
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        return hashlib.sha256(json.dumps([__version__, *parts], default=str).encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def lookup(self, key: str, variables: Mapping[str, Any]) -> bool:
+        """Returns whether entry `key` is valid, only variables used by the stored run are read
+        from `variables`."""
+        entry_path = self._entry_path(key)
+        try:
+            entry = json.loads(entry_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return False
+
+        for name, value in entry.get("variables", {}).items():
+            if name not in variables or _json_value(variables[name]) != value:
+                return False
+        for files in (entry["inputs"], entry["outputs"]):
+            if any(file_hash(Path(path)) != digest for path, digest in files.items()):
+                return False
+
+        os.utime(entry_path)
+        return True
+
+    def store(
+        self,
+        key: str,
+        variables: Dict[str, Any],
+        inputs: Iterable[Path],
+        outputs: Iterable[Path],
+    ):
+        entry = {
+            "variables": {name: _json_value(value) for name, value in variables.items()},
+            "inputs": {Path(p).absolute().as_posix(): file_hash(p) for p in inputs},
+            "outputs": {Path(p).absolute().as_posix(): file_hash(p) for p in outputs},
+        }
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_path = self._entry_path(key)
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entry, indent=4))
+        os.replace(tmp_path, entry_path)
+        self.evict()
+
+    def evict(self):
+        entries = sorted(self.cache_dir.glob("*.json"), key=_mtime)
+        for entry_path in entries[: max(len(entries) - self.max_entries, 0)]:
+            entry_path.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=None)
+def model_signature(model_type: type) -> str:
+    """Returns name of `model_type` with names and types of its fields (recursively), so that
+    snapshots of models are not used after their fields change."""
+    fields = getattr(model_type, "__fields__", {})
+    signature = [f"{model_type.__module__}.{model_type.__qualname__}"]
+    for name, field in fields.items():
+        signature.append(f"{name}: {field.outer_type_!r}")
+        if hasattr(field.type_, "__fields__"):
+            signature.append(model_signature(field.type_))
+    return hashlib.sha256("\n".join(signature).encode()).hexdigest()
+
+
+class SnapshotCache:
+    """On-disk cache of parsed and validated configs.
+
+    Each entry is a pickled model stored under a key derived from the config type and its
+    fields, path, size, modification time and content hash of the config file and package
+    version, so loading a cached config skips yaml parsing and validation. Least recently used
+    entries are evicted when there are more than `max_entries` of them.
+
+    Entries are also kept in memory, so configs loaded repeatedly by a long-lived process (or
+    inherited by processes forked from it) are not read from disk again.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SnapshotCache":
+        return cls(settings.snapshot_dir, settings.snapshot_max_entries)
+
+    @staticmethod
+    def key(config_type: type, path: Path, *parts: Any) -> Optional[str]:
+        """Returns key of config of type `config_type` parsed from `path` or None if the file
+        cannot be read."""
+        path = Path(path).absolute()
+        try:
+            stat = path.stat()
+            content = path.read_bytes()
+        except OSError:
+            return None
+        return GenerateCache.key(
+            model_signature(config_type),
+            path.as_posix(),
+            stat.st_size,
+            stat.st_mtime_ns,
+            hashlib.sha256(content).hexdigest(),
+            *parts,
+        )
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pickle"
+
+    def lookup(self, key: str) -> Optional[Any]:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            return pickle.loads(data)
+
+        entry_path = self._entry_path(key)
+        try:
+            data = entry_path.read_bytes()
+            obj = pickle.loads(data)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # entry written by incompatible version of a dependency or truncated
+            entry_path.unlink(missing_ok=True)
+            return None
+        try:
+            if not _read_only:
+                os.utime(entry_path)
+        except OSError:
+            # cache directory is read-only, e.g. in CI
+            pass
+        self._remember(key, data)
+        return obj
+
+    def store(self, key: str, obj: Any):
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, data)
+        if _read_only:
+            return
+        entry_path = self._entry_path(key)
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            return
+        self.evict()
+
+    def _remember(self, key: str, data: bytes):
+        self._memory[key] = data
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def evict(self):
+        entries = sorted(self.cache_dir.glob("*.pickle"), key=_mtime)
+        for entry_path in entries[: max(len(entries) - self.max_entries, 0)]:
+            entry_path.unlink(missing_ok=True)
+
+
+_snapshot_cache: Optional[SnapshotCache] = None
+_read_only = False
+
+
+def get_snapshot_cache() -> Optional[SnapshotCache]:
+    return _snapshot_cache
+
+
+def set_snapshot_cache(snapshot_cache: Optional[SnapshotCache]):
+    """Sets snapshot cache used when parsing configs, None disables it."""
+    global _snapshot_cache
+    _snapshot_cache = snapshot_cache
+
+
+@contextmanager
+def read_only_snapshots(enabled: bool = True) -> Iterator[None]:
+    """Snapshots are looked up and kept in memory, but not written to disk within the block
+    (if `enabled`), also by snapshot caches set inside of it."""
+    global _read_only
+    previous = _read_only
+    _read_only = _read_only or enabled
+    try:
+        yield
+    finally:
+        _read_only = previous
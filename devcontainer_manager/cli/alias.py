@@ -3,35 +3,34 @@ from typing import List
 
 import typer
 
-from ..global_config import GlobalConfig
-
 app = typer.Typer()
 
 
 def complete_aliases(param_name: str = "alias"):
     def _complete(ctx: typer.Context, args: List[str], incomplete: str):
-        global_config = GlobalConfig.load()
+        from ..completion import load_aliases
+
         param_aliases = ctx.params.get(param_name) or []
-        for alias, path in global_config.load_alias_config().aliases.items():
+        for alias, path in load_aliases().items():
             if alias.startswith(incomplete) and alias not in param_aliases:
-                yield (alias, path.as_posix())
+                yield (alias, path)
 
     return _complete
 
 
 @app.command()
 def add(alias: str = typer.Argument(...), config_path: str = typer.Argument(...)):
-    path = Path(config_path).resolve()
-    global_config = GlobalConfig.load()
-    global_config_dir = global_config.config_path.resolve().parent
+    from ..context import get_context
 
-    alias_config = global_config.load_alias_config()
+    path = Path(config_path).resolve()
+    context = get_context(create_if_not_exist=True)
+    global_config_dir = context.global_config.config_path.resolve().parent
 
     if path.as_posix().startswith(global_config_dir.as_posix()):
         path = path.relative_to(global_config_dir)
 
-    alias_config.aliases[alias] = path
-    alias_config.write_yaml()
+    context.alias_config.aliases[alias] = path
+    context.write_alias_config()
     typer.echo(f"Alias created: '{typer.style(alias, fg=typer.colors.BLUE)}'")
 
 
@@ -39,12 +38,15 @@ def add(alias: str = typer.Argument(...), config_path: str = typer.Argument(...)
 def remove(
     alias: List[str] = typer.Argument(..., autocompletion=complete_aliases("alias")),
 ):
-    alias_config = GlobalConfig.load().load_alias_config()
+    from ..context import get_context
+
+    context = get_context(create_if_not_exist=True)
+    alias_config = context.alias_config
 
     for alias_remove in alias:
         if alias_remove in alias_config.aliases:
             alias_config.aliases.pop(alias_remove)
-            alias_config.write_yaml()
+            context.write_alias_config()
         else:
             message = (
                 f"{typer.style('Error: ', fg=typer.colors.RED)}"
@@ -57,13 +59,15 @@ def remove(
 
 @app.command()
 def list():
-    global_config = GlobalConfig.load()
+    from ..context import get_context
+
+    context = get_context(create_if_not_exist=True)
     typer.echo("Available aliases:")
     aliases_msg = ""
-    for alias, path in global_config.load_alias_config().aliases.items():
+    for alias, path in context.alias_config.aliases.items():
         path = Path(path)
         if not path.is_absolute():
-            path = global_config.config_path.parent / path
+            path = context.global_config.config_path.parent / path
 
         file_color = typer.colors.GREEN if path.exists() else typer.colors.RED
         aliases_msg += (
@@ -1,22 +1,23 @@
 import subprocess
-from functools import reduce
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
 import typer
-from cookiecutter.main import cookiecutter
 
 from .. import __version__
-from ..config import Config
-from ..global_config import GlobalConfig
-from . import alias
+from . import alias, daemon
 
-TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
-COOKIECUTTER_CONFIG = TEMPLATE_DIR / "cookiecutter.json"
+if TYPE_CHECKING:
+    from ..generator import Generator
 
+# heavy dependencies (pydantic, ruamel.yaml, jinja2) are imported inside commands so that
+# `--version`, `alias` and `daemon` commands and shell completion start fast
 
 app = typer.Typer()
 app.add_typer(alias.app, name="alias")
+app.add_typer(daemon.app, name="daemon")
 
 
 @app.command()
@@ -25,53 +26,316 @@ def generate(
         None, autocompletion=alias.complete_aliases("templates")
     ),
     build: bool = typer.Option(False, "--build", "-b"),
+    force_build: bool = typer.Option(
+        False, "--force-build", help="build image even if it is up to date, implies --build"
+    ),
     print_config: bool = typer.Option(False, "--print-config", "--print", "-p"),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="regenerate outputs even if inputs did not change"
+    ),
+    frozen: bool = typer.Option(
+        False,
+        "--frozen",
+        help="generate from devcontainer.lock, fail if any config in the locked chain changed",
+    ),
+    check: bool = typer.Option(
+        False,
+        "--check",
+        help="do not write files, exit with 1 if any generated file differs from file on disk",
+    ),
+    diff: bool = typer.Option(
+        False, "--diff", help="do not write files, print diff of generated files, implies --check"
+    ),
+    projects: Optional[List[Path]] = typer.Option(
+        None,
+        "--projects",
+        help=(
+            "generate multiple projects - project directory, directory of projects or file "
+            "with list of project directories"
+        ),
+    ),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", help="number of parallel processes used with --projects"
+    ),
+    timings: bool = typer.Option(False, "--timings", help="print time spent in each phase"),
+    timings_json: bool = typer.Option(
+        False, "--timings-json", help="print time spent in each phase as json lines"
+    ),
+    profile: Optional[Path] = typer.Option(
+        None, "--profile", help="write cProfile stats to file", dir_okay=False
+    ),
+):
+    from ..cache import read_only_snapshots
+    from ..settings import Settings
+
+    settings = Settings()
+    timings_format = "json" if timings_json else "table" if timings else settings.timings
+    instrumented = _instrumented(timings_format, profile or settings.profile)
+    # --check and --diff write nothing, not even snapshots of parsed configs
+    with instrumented, read_only_snapshots(check or diff):
+        _generate(
+            settings,
+            templates,
+            build or force_build,
+            force_build,
+            print_config,
+            no_cache,
+            frozen,
+            check or diff,
+            diff,
+            projects,
+            jobs,
+        )
+
+
+@contextmanager
+def _instrumented(timings_format: Optional[str], profile_path: Optional[Path]):
+    from .. import timing
+
+    if timings_format:
+        timing.enable()
+    profiler = None
+    if profile_path:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if timings_format == "json":
+            typer.echo(timing.format_json_lines(), err=True)
+        elif timings_format:
+            typer.echo(f"\n{timing.format_table()}", err=True)
+
+
+def _generate(
+    settings,
+    templates: Optional[List[str]],
+    build: bool,
+    force_build: bool,
+    print_config: bool,
+    no_cache: bool,
+    frozen: bool,
+    check: bool,
+    diff: bool,
+    projects: Optional[List[Path]],
+    jobs: Optional[int],
 ):
-    global_config: GlobalConfig = GlobalConfig.load(create_if_not_exist=True)
-    alias_config = global_config.load_alias_config()
-    from_override = not templates
-
-    if from_override:
-        template_path = global_config.defaults.project_path / global_config.override_config_path
-        overrides_exist = template_path.exists()
-        path_color = typer.colors.GREEN if overrides_exist else typer.colors.RED
+    from ..context import get_context
+    from ..exceptions import (
+        ConfigDoesNotExistException,
+        InvalidArgumentException,
+        LockDriftException,
+    )
+    from ..generator import Generator
+    from ..timing import span
+
+    with span("context.load"):
+        context = get_context(settings, create_if_not_exist=not check)
+    if context is None:
+        typer.echo(f"Error: '{settings.global_config_path}' does not exist", err=True)
+        raise typer.Exit(1)
+    generator = Generator(context, use_cache=not no_cache, force_build=force_build, frozen=frozen)
+
+    if check and (projects or build):
+        typer.echo(
+            "Error: --check and --diff can not be used with --projects or --build", err=True
+        )
+        raise typer.Exit(1)
+    if projects:
+        if print_config:
+            typer.echo("Error: --print-config can not be used with --projects", err=True)
+            raise typer.Exit(1)
+        _generate_projects(generator, projects, templates, build, jobs)
+        return
+
+    if not templates:
+        template_path = generator.overrides_path
+        path_color = typer.colors.GREEN if template_path.exists() else typer.colors.RED
         typer.echo(f"Reading config from {typer.style(template_path, path_color)}\n")
-        if not overrides_exist:
-            typer.echo(
-                "Template argument not specified and "
-                f"{typer.style('.devcontainer/overrides.yaml', path_color)} does not exist"
+
+    try:
+        if print_config:
+            typer.echo(generator.layered(templates).config.yaml())
+            raise typer.Exit()
+        if check:
+            _check(generator, templates, diff)
+            return
+
+        result = generator.generate(templates)
+    except ConfigDoesNotExistException:
+        typer.echo(
+            "Template argument not specified and "
+            f"{typer.style('.devcontainer/overrides.yaml', path_color)} does not exist"
+        )
+        raise typer.Exit(1)
+    except (InvalidArgumentException, LockDriftException) as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+
+    if result.up_to_date:
+        typer.echo("Outputs are up to date")
+    for path in result.changed:
+        typer.echo(f"Updated '{typer.style(path, typer.colors.GREEN)}'")
+
+    if build:
+        generator.build()
+
+
+def _check(generator: "Generator", templates: Optional[List[str]], diff: bool):
+    drifts = generator.check(templates)
+    for drift in drifts:
+        if diff:
+            typer.echo(drift.diff, nl=False)
+        else:
+            typer.echo(f"Would update '{typer.style(drift.path, typer.colors.RED)}'")
+    if drifts:
+        raise typer.Exit(1)
+    typer.echo("Outputs are up to date")
+
+
+def _generate_projects(
+    generator: "Generator",
+    projects: List[Path],
+    templates: Optional[List[str]],
+    build: bool,
+    jobs: Optional[int],
+):
+    from .. import timing
+    from ..batch import bake_projects, find_projects, generate_projects
+
+    project_dirs = find_projects(projects, generator.overrides_path)
+    status_colors = {
+        "generated": typer.colors.GREEN,
+        "up to date": typer.colors.BLUE,
+        "failed": typer.colors.RED,
+    }
+
+    start = time.perf_counter()
+    failed = 0
+    results = []
+    for result in generate_projects(generator, project_dirs, templates, build, jobs):
+        results.append(result)
+        status = typer.style(result.status, fg=status_colors[result.status])
+        message = f" - {result.message}" if result.message else ""
+        typer.echo(f"  {result.project_dir}: {status} ({result.duration:.2f}s){message}")
+        failed += result.status == "failed"
+        timing.record(result.spans)
+
+    typer.echo(
+        f"\n{len(project_dirs)} projects, {failed} failed " f"({time.perf_counter() - start:.2f}s)"
+    )
+
+    if build:
+        try:
+            targets = bake_projects(
+                [r.project_dir for r in results if r.status != "failed"], generator.force_build
             )
+        except subprocess.CalledProcessError as e:
+            typer.echo(f"Error: docker buildx bake failed with exit code {e.returncode}", err=True)
             raise typer.Exit(1)
-        templates = [template_path.as_posix()]
-    else:
-        templates = [alias_config.resolve(t) for t in templates]
+        if targets:
+            typer.echo(f"Baked {len(targets)} images: {', '.join(targets)}")
+    if failed:
+        raise typer.Exit(1)
 
-    configs = [Config.parse_file(t).merge_bases() for t in templates]
-    merged_config = global_config.merge_bases().defaults | reduce(lambda a, b: a | b, configs)
 
-    if print_config:
-        typer.echo(merged_config.yaml())
-        raise typer.Exit()
+@app.command()
+def watch(
+    templates: Optional[List[str]] = typer.Argument(
+        None, autocompletion=alias.complete_aliases("templates")
+    ),
+    debounce: float = typer.Option(
+        0.05, "--debounce", help="seconds to wait for more changes before regenerating"
+    ),
+    poll: bool = typer.Option(False, "--poll", help="poll files instead of using inotify"),
+):
+    """Regenerate devcontainer files whenever any config in their chain changes."""
+    from ..watch import WatchSession, create_watcher
 
-    config_path = global_config.defaults.project_path / global_config.override_config_path
-    COOKIECUTTER_CONFIG.write_text(
-        merged_config.resolve(config_path).json(indent=4, exclude={"base_config": True})
-    )
-    cookiecutter(TEMPLATE_DIR.as_posix(), no_input=True, overwrite_if_exists=True)
+    session = WatchSession(templates)
+    watcher = create_watcher(poll)
+    typer.echo(f"Watching with {type(watcher).__name__}, press Ctrl+C to stop")
+    try:
+        for event in session.run(watcher, debounce):
+            for path in event.changed:
+                typer.echo(f"Changed '{path}'")
+            if event.error is not None:
+                typer.echo(f"{typer.style('Error', typer.colors.RED)}: {event.error}", err=True)
+                continue
+            for path in event.result.changed:
+                typer.echo(f"Updated '{typer.style(path, typer.colors.GREEN)}'")
+            typer.echo(
+                f"{'Outputs are up to date' if event.result.up_to_date else 'Regenerated'} "
+                f"({event.duration * 1000:.0f}ms)"
+            )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+@app.command()
+def explain(
+    field: str = typer.Argument(..., help="dotted config field, e.g. devcontainer.image"),
+    templates: Optional[List[str]] = typer.Argument(
+        None, autocompletion=alias.complete_aliases("templates")
+    ),
+):
+    """Show merged value of config field and which configs set it."""
+    from ..context import get_context
+    from ..exceptions import ConfigDoesNotExistException, InvalidArgumentException
+    from ..generator import Generator
 
-    if not from_override:
-        config_paths = [alias_config.path_to_alias(cfg.config_path) for cfg in configs]
-        override_config = Config.none()
-        override_config.base_config = config_paths
-        override_config.write_yaml(config_path)
+    generator = Generator(get_context(create_if_not_exist=True))
+    try:
+        layered = generator.layered(templates)
+        value, sources = layered.get(field)
+    except (ConfigDoesNotExistException, InvalidArgumentException) as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
 
-    devcontainer_dir = merged_config.project_path / ".devcontainer"
-    if not merged_config.docker.file:
-        (devcontainer_dir / "devcontainer.Dockerfile").unlink()
-        (devcontainer_dir / "build.sh").unlink()
+    typer.echo(f"{typer.style(field, bold=True)}: {_format_value(value)}")
+    resolved = layered.resolved(field)
+    if resolved != value:
+        typer.echo(f"resolved: {_format_value(resolved)}")
+    typer.echo("set by:")
+    for source, source_value in sources:
+        typer.echo(f"  {typer.style(source, typer.colors.GREEN)}: {_format_value(source_value)}")
 
-    if build:
-        subprocess.run(["bash", ".devcontainer/build.sh"], check=True)
+
+@app.command()
+def dockerfile_diff(
+    templates: Optional[List[str]] = typer.Argument(
+        None, autocompletion=alias.complete_aliases("templates")
+    ),
+):
+    """Show how `docker.optimize` changes dockerfile commands, without writing any files."""
+    from ..context import get_context
+    from ..dockerfile import diff
+    from ..exceptions import ConfigDoesNotExistException
+    from ..generator import Generator
+
+    generator = Generator(get_context(create_if_not_exist=True))
+    try:
+        resolved_config = generator.resolve(templates)
+    except ConfigDoesNotExistException as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+
+    changes = diff(resolved_config.docker.additional_commands)
+    typer.echo(changes.rstrip("\n") if changes else "Dockerfile commands are already optimal")
+
+
+def _format_value(value) -> str:
+    import json
+
+    return json.dumps(value, default=str)
 
 
 @app.command()
@@ -80,7 +344,10 @@ def create_template(
     force: bool = typer.Option(False, "--force", "-f"),
     with_descriptions: bool = typer.Option(True, "-d/-D", "--with-description/--no-description"),
 ):
-    global_config = GlobalConfig.load(create_if_not_exist=True)
+    from ..config import Config
+    from ..context import get_context
+
+    global_config = get_context(create_if_not_exist=True).global_config
 
     path = Path(template_path)
 
@@ -0,0 +1,52 @@
+import typer
+
+app = typer.Typer(help="Resident daemon keeping configs loaded between commands.")
+
+
+@app.command()
+def start():
+    """Start the daemon in background."""
+    from .. import daemon
+
+    pid = daemon.running_pid()
+    if pid is not None:
+        typer.echo(f"Daemon is already running (pid {pid})")
+        return
+    pid = daemon.start()
+    if pid is None:
+        typer.echo(f"Error: daemon did not start, see '{daemon.log_path()}'", err=True)
+        raise typer.Exit(1)
+    typer.echo(f"Daemon started (pid {pid}), listening on '{daemon.socket_path()}'")
+
+
+@app.command()
+def run():
+    """Run the daemon in foreground."""
+    from .. import daemon
+
+    pid = daemon.running_pid()
+    if pid is not None:
+        typer.echo(f"Error: daemon is already running (pid {pid})", err=True)
+        raise typer.Exit(1)
+    daemon.serve()
+
+
+@app.command()
+def stop():
+    """Stop the daemon."""
+    from .. import daemon
+
+    pid = daemon.stop()
+    typer.echo("Daemon is not running" if pid is None else f"Daemon stopped (pid {pid})")
+
+
+@app.command()
+def status():
+    """Show whether the daemon is running."""
+    from .. import daemon
+
+    pid = daemon.running_pid()
+    if pid is None:
+        typer.echo("Daemon is not running")
+        raise typer.Exit(1)
+    typer.echo(f"Daemon is running (pid {pid}), listening on '{daemon.socket_path()}'")
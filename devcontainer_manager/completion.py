@@ -0,0 +1,61 @@
+"""Alias index for shell completion.
+
+Completion runs on every TAB press, so it reads a flat json index stored next to the alias
+config instead of loading the configs. This module must import only the standard library.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from .util import file_stat, write_if_changed
+
+INDEX_FILENAME = "aliases.index.json"
+ALIAS_FILENAME = "aliases.yaml"  # same as `alias.DEFAULT_ALIAS_FILENAME`
+GLOBAL_CONFIG_DIR_ENV = "devcontainer_manager_global_config_dir"
+
+
+def global_config_dir() -> Path:
+    """Same as `Settings().global_config_dir` without loading settings."""
+    for key, value in os.environ.items():
+        if key.lower() == GLOBAL_CONFIG_DIR_ENV:
+            return Path(value)
+    return Path().home() / ".devcontainer_manager"
+
+
+def write_index(alias_path: Path, aliases: Dict[str, Path]):
+    index = {
+        "stat": file_stat(alias_path),
+        "aliases": {alias: Path(path).as_posix() for alias, path in aliases.items()},
+    }
+    write_if_changed(alias_path.parent / INDEX_FILENAME, json.dumps(index))
+
+
+def read_index(alias_path: Path) -> Optional[Dict[str, str]]:
+    """Returns aliases from index or None if the index does not exist or is stale."""
+    try:
+        index = json.loads((alias_path.parent / INDEX_FILENAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+    stat = index.get("stat")
+    if stat is None or tuple(stat) != file_stat(alias_path):
+        return None
+    return index["aliases"]
+
+
+def load_aliases() -> Dict[str, str]:
+    """Returns mapping of aliases to template paths, rebuilding stale index from alias config."""
+    alias_path = global_config_dir().resolve() / ALIAS_FILENAME
+    aliases = read_index(alias_path)
+    if aliases is not None:
+        return aliases
+
+    from .context import get_context
+
+    context = get_context()
+    if context is None:
+        return {}
+    alias_config = context.alias_config
+    write_index(alias_config.config_path, alias_config.aliases)
+    return {alias: path.as_posix() for alias, path in alias_config.aliases.items()}
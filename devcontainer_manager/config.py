@@ -1,13 +1,13 @@
-import os
-import platform
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Mapping, Optional
 
-from pydantic import BaseModel, Field, root_validator, validator
+from pydantic import Field, root_validator, validator
 
 from .base_config import BaseYamlConfigModel, BaseYamlConfigModelWithBase, default_if_none
+from .resolver import render_template_values
+from .timing import span
 from .types import MountString
-from .util import get_project_root_basename, render_recursive_template
+from .variables import GlobalVariables
 
 
 class DevcontainerConfig(BaseYamlConfigModel):
@@ -98,13 +98,24 @@ class DockerConfig(BaseYamlConfigModel):
     file: Optional[Path] = Field(
         None,
         description=(
-            "path for base dockerfile to use for building custom image\n"
+            "path for base dockerfile to use for building custom image, relative paths\n"
+            "(also in include) are relative to directory of the project overrides config\n"
             "null means that the dockerfile will not be generated\n"
             "if the path is valid, two files will be generated - devcontainer.Dockerfile\n"
             "and build.sh script for building this dockerfile"
         ),
     )
 
+    include: Optional[List[Path]] = Field(
+        default_factory=list,
+        description=(
+            "additional dockerfile fragments that will be appended to the base dockerfile\n"
+            "(in order) before additional_commands, i.e.:\n"
+            "include:\n"
+            "- /home/developer/dockerfiles/tools.Dockerfile"
+        ),
+    )
+
     additional_commands: Optional[List[str]] = Field(
         default_factory=list,
         description=(
@@ -123,23 +134,43 @@ class DockerConfig(BaseYamlConfigModel):
         ),
     )
 
-    _not_none = validator("*", pre=True, allow_reuse=True)(default_if_none)
+    optimize: Optional[bool] = Field(
+        False,
+        description=(
+            "optimize additional_commands for build cache - consecutive apt and pip installs\n"
+            "are merged into one step and ENV, ARG and LABEL instructions not used by later\n"
+            "commands are moved to the end, use `dockerfile-diff` command to see the changes"
+        ),
+    )
+
+    bake: Optional[bool] = Field(
+        False,
+        description=(
+            "build image with `docker buildx bake` - docker-bake.json with the build target\n"
+            "is generated next to the dockerfile, with `generate --projects --build` images\n"
+            "of all projects are built by a single bake so that they are built in parallel"
+        ),
+    )
 
+    cache_from: Optional[List[str]] = Field(
+        default_factory=list,
+        description=(
+            "external cache sources for bake target, i.e.:\n"
+            "cache_from:\n"
+            "- type=local,src=/home/developer/.cache/buildx"
+        ),
+    )
 
-class GlobalVariables(BaseModel):
-    project_root_basename: str = Field(
-        default_factory=get_project_root_basename, description="root directory of current project"
+    cache_to: Optional[List[str]] = Field(
+        default_factory=list,
+        description=(
+            "cache export destinations for bake target, i.e.:\n"
+            "cache_to:\n"
+            "- type=local,dest=/home/developer/.cache/buildx,mode=max"
+        ),
     )
-    uid: str = Field(default_factory=os.getuid, description="id of current user")
-    login: str = Field(default_factory=os.getlogin, description="username of current user")
-    hostname: str = Field(default_factory=platform.node, description="hostname of current machine")
 
-    def to_readme_string(self):
-        global_variables_info = []
-        for k in self.dict():
-            field = self.__fields__[k]
-            global_variables_info.append(f"{{{{ {k} }}}}: {field.field_info.description}")
-        return "\n".join(global_variables_info) + "\n"
+    _not_none = validator("*", pre=True, allow_reuse=True)(default_if_none)
 
 
 class Config(BaseYamlConfigModelWithBase):
@@ -155,22 +186,31 @@ class Config(BaseYamlConfigModelWithBase):
 
     _not_none = validator("*", pre=True, allow_reuse=True)(default_if_none)
 
-    def resolve(self, config_path: Path = None) -> "ResolvedConfig":
-        values = self.dict()
-        values.update(GlobalVariables().dict())
+    def resolve(
+        self, variables: Optional[Mapping] = None, config_path: Optional[Path] = None
+    ) -> "ResolvedConfig":
+        """Returns config with templates rendered and docker paths resolved relative to
+        directory of `config_path` (`self.config_path` if not given)."""
+        values = self.resolved_values(variables)
+        values["config_path"] = config_path if config_path is not None else self.config_path
+        return ResolvedConfig.parse_obj(values)
 
-        cfg_copy: Config = self.copy(deep=True)
-        cfg_copy.devcontainer.workspace_mount = (
-            self.devcontainer.workspace_mount.to_devcontainer_format()
-        )
-        cfg_copy.devcontainer.mounts = [
-            mount.to_devcontainer_format() for mount in cfg_copy.devcontainer.mounts
+    def resolved_values(self, variables: Optional[Mapping] = None) -> dict:
+        """Returns values of this config with all templates rendered, without validation.
+
+        Only global variables referenced by templates are computed.
+        """
+        values = self.dict()
+        workspace_mount = self.devcontainer.workspace_mount.to_devcontainer_format()
+        values["devcontainer"]["workspace_mount"] = workspace_mount
+        values["devcontainer"]["mounts"] = [
+            mount.to_devcontainer_format() for mount in self.devcontainer.mounts
         ]
 
-        rendered_template = render_recursive_template(cfg_copy.json(), values)
-        new_config = Config.parse_raw(rendered_template)
-        new_config.config_path = config_path if config_path is not None else self.config_path
-        return ResolvedConfig.parse_obj(new_config.dict(exclude={"config_path": {}}))
+        if variables is None:
+            variables = GlobalVariables()
+        with span("template.render"):
+            return render_template_values(values, variables)
 
     @classmethod
     def none(cls):
@@ -184,21 +224,28 @@ class Config(BaseYamlConfigModelWithBase):
 class ResolvedConfig(Config):
     @root_validator
     def validate_nested(cls, values):
-        cls._validate_docker_path(values)
+        cls._validate_docker_paths(values)
         return values
 
-    def _validate_docker_path(values):
+    @property
+    def dockerfile_sources(self) -> List[Path]:
+        """Returns absolute paths of the base dockerfile and all included fragments."""
+        if self.docker.file is None:
+            return []
+        return [self.docker.file, *self.docker.include]
+
+    def _validate_docker_paths(values):
         docker: DockerConfig = values.get("docker")
         config_path: Path = values.get("config_path").resolve().parent
-        docker_config_path = docker.file
-        if docker_config_path is None:
+        if docker.file is None:
             return
 
-        if not docker_config_path.is_absolute():
-            docker_config_path = (config_path / docker_config_path).resolve()
+        def resolve_path(field: str, path: Path) -> Path:
+            if not path.is_absolute():
+                path = (config_path / path).resolve()
+            if not path.exists():
+                raise ValueError(f"invalid value for '{field}' - path '{path}' does not exist")
+            return path
 
-        if not docker_config_path.exists():
-            raise ValueError(
-                f"invalid value for 'docker.file' - path '{docker_config_path}' " "does not exist"
-            )
-        docker.file = Path(docker_config_path).read_text()
+        docker.file = resolve_path("docker.file", docker.file)
+        docker.include = [resolve_path("docker.include", path) for path in docker.include]
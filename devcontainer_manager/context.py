@@ -0,0 +1,78 @@
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Optional
+
+from . import completion
+from .alias import AliasConfig
+from .cache import SnapshotCache, set_snapshot_cache
+from .config import Config
+from .global_config import GlobalConfig
+from .settings import Settings
+from .util import FileStat, file_stat
+
+
+class Context:
+    """Global state loaded once per process - settings, global config, alias config and defaults.
+
+    Long-lived callers should use `get_context` which reloads the context when any of the
+    loaded files changed on disk.
+    """
+
+    def __init__(self, settings: Settings, global_config: GlobalConfig, alias_config: AliasConfig):
+        self.settings = settings
+        self.global_config = global_config
+        self.alias_config = alias_config
+        self._stats: Dict[Path, FileStat] = {}
+        self._record_stats()
+
+    @classmethod
+    def load(
+        cls, settings: Settings = None, create_if_not_exist: bool = False
+    ) -> Optional["Context"]:
+        settings = settings or Settings()
+        set_snapshot_cache(
+            SnapshotCache.from_settings(settings) if settings.snapshot_max_entries > 0 else None
+        )
+        global_config = GlobalConfig.load(settings, create_if_not_exist=create_if_not_exist)
+        if global_config is None:
+            return None
+        return cls(settings, global_config, global_config.load_alias_config())
+
+    @cached_property
+    def defaults(self) -> Config:
+        defaults = self.global_config.defaults
+        self._stats[defaults.config_path] = file_stat(defaults.config_path)
+        return defaults
+
+    @property
+    def files(self):
+        return list(self._stats)
+
+    def is_stale(self) -> bool:
+        return any(file_stat(path) != stat for path, stat in self._stats.items())
+
+    def write_alias_config(self):
+        self.alias_config.write_yaml()
+        self._stats[self.alias_config.config_path] = file_stat(self.alias_config.config_path)
+        completion.write_index(self.alias_config.config_path, self.alias_config.aliases)
+
+    def _record_stats(self):
+        for path in [self.global_config.config_path, self.alias_config.config_path]:
+            self._stats[path] = file_stat(path)
+
+
+_context: Optional[Context] = None
+
+
+def get_context(settings: Settings = None, create_if_not_exist: bool = False) -> Optional[Context]:
+    """Returns context shared by the whole process, loading it only if it was not loaded yet,
+    settings changed or any of the loaded files changed."""
+    global _context
+    settings = settings or Settings()
+    if (
+        _context is None
+        or _context.settings.global_config_path != settings.global_config_path
+        or _context.is_stale()
+    ):
+        _context = Context.load(settings, create_if_not_exist=create_if_not_exist)
+    return _context
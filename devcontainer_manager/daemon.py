@@ -0,0 +1,300 @@
+"""Resident daemon serving command line requests over a unix socket.
+
+The daemon keeps the global config, alias config, parsed templates and compiled jinja templates
+loaded. The command line client forwards its arguments, working directory, environment and
+standard streams (as file descriptors) to the daemon, which forks a process for every request.
+The process inherits the loaded state, runs the command as if it was run by the client and
+replies with its exit code, so simultaneous requests (e.g. `generate` in parallel checkouts)
+neither block nor see each other's working directory and environment. Loaded files are
+checked for changes in the daemon and again in every request process, and settings (e.g. the
+yaml backend) are read from the environment of every request.
+
+When the daemon is not running, the client runs commands in process. This module must import
+only the standard library.
+"""
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from . import __version__
+from .completion import global_config_dir
+from .util import FileStat, file_stat
+
+SOCKET_FILENAME = "daemon.sock"
+NO_DAEMON_ENV = "DEVCONTAINER_MANAGER_NO_DAEMON"
+# commands always run in process - daemon management and long-running commands
+LOCAL_COMMANDS = {"daemon", "watch"}
+# seconds between refreshes of loaded state
+REFRESH_INTERVAL = 0.5
+STANDARD_STREAMS = (0, 1, 2)
+
+
+def socket_path() -> Path:
+    return global_config_dir() / SOCKET_FILENAME
+
+
+def pid_path(path: Optional[Path] = None) -> Path:
+    return (path or socket_path()).with_suffix(".pid")
+
+
+def log_path(path: Optional[Path] = None) -> Path:
+    return (path or socket_path()).with_suffix(".log")
+
+
+def running_pid(path: Optional[Path] = None) -> Optional[int]:
+    """Returns pid of daemon listening on socket `path` or None if it is not running."""
+    path = path or socket_path()
+    try:
+        pid = int(pid_path(path).read_text())
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return None
+    return pid if path.exists() else None
+
+
+def _is_forwarded(argv: Sequence[str]) -> bool:
+    if os.environ.get(NO_DAEMON_ENV) or not hasattr(socket, "send_fds"):
+        return False
+    command = next((arg for arg in argv if not arg.startswith("-")), None)
+    return command not in LOCAL_COMMANDS
+
+
+def _read_reply(response) -> Optional[dict]:
+    line = response.readline()
+    return json.loads(line) if line else None
+
+
+def forward(
+    argv: List[str], prog_name: str = "devcontainer_manager", path: Optional[Path] = None
+) -> Optional[int]:
+    """Runs command `argv` in the daemon and returns its exit code.
+
+    Returns None if the command should be run in process instead - the daemon is not running,
+    runs different version or the command is not forwarded.
+    """
+    path = path or socket_path()
+    if not _is_forwarded(argv) or not path.exists():
+        return None
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    request = {
+        "version": __version__,
+        "argv": argv,
+        "prog_name": prog_name,
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+    }
+    with client, client.makefile("rb") as response:
+        try:
+            client.connect(path.as_posix())
+            socket.send_fds(client, [b"\n"], list(STANDARD_STREAMS))
+            client.sendall(json.dumps(request).encode() + b"\n")
+            reply = _read_reply(response)
+        except OSError:
+            return None
+        if reply is None or reply.get("fallback"):
+            return None
+
+        # the request process is in another session, interrupts of the client are forwarded
+        while True:
+            try:
+                reply = _read_reply(response)
+                break
+            except KeyboardInterrupt:
+                os.kill(reply["pid"], signal.SIGINT)
+
+    if reply is None:
+        print("Error: devcontainer_manager daemon closed connection", file=sys.stderr)
+        return 1
+    return reply["exit_code"]
+
+
+def _run(request: dict, fds: List[int]) -> int:
+    """Runs command line interface with arguments, working directory, environment and standard
+    streams of the client."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    for stream in (sys.stdout, sys.stderr):
+        stream.flush()
+    for target, fd in zip(STANDARD_STREAMS, fds):
+        os.dup2(fd, target)
+        os.close(fd)
+
+    from .cli.cli import app
+    from .yaml import set_backend
+
+    # forget yaml backend of the daemon's settings, the client's settings are read on first use
+    set_backend(None)
+    try:
+        app(args=request["argv"], prog_name=request["prog_name"])
+        exit_code = 0
+    except SystemExit as e:
+        if isinstance(e.code, int) or e.code is None:
+            exit_code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            stream.flush()
+    return exit_code
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # runs in the forked request process
+        _, fds, _, _ = socket.recv_fds(self.request, 1, len(STANDARD_STREAMS))
+        line = self.rfile.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        if request.get("version") != __version__ or len(fds) != len(STANDARD_STREAMS):
+            self._reply(fallback=True)
+            return
+        self._reply(pid=os.getpid())
+        self._reply(exit_code=_run(request, fds))
+
+    def _reply(self, **reply):
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+        self.wfile.flush()
+
+
+class WarmState:
+    """State loaded by the daemon and inherited by request processes.
+
+    Templates are parsed through the snapshot cache, which keeps them in memory, so request
+    processes restore them without parsing and validating. The files are still read and hashed
+    by every request to check that they did not change. The daemon parses files again only if
+    their stat changed.
+    """
+
+    def __init__(self):
+        self.stats: Dict[Path, FileStat] = {}
+        self.snapshot_cache = None
+
+    def refresh(self):
+        from .cache import get_snapshot_cache
+        from .config import Config
+        from .context import get_context
+        from .renderer import environment
+
+        context = get_context()
+        if context is None:
+            return
+        context.defaults  # loaded once and inherited by request processes
+        for name in environment.list_templates():
+            environment.get_template(name)
+
+        if get_snapshot_cache() is not self.snapshot_cache:
+            # context was reloaded with new cache
+            self.snapshot_cache = get_snapshot_cache()
+            self.stats.clear()
+        for path in self.template_paths(context):
+            stat = file_stat(path)
+            if stat is None or self.stats.get(path) == stat:
+                continue
+            try:
+                Config.parse_file(path)
+            except Exception:
+                # invalid templates are reported by commands that load them
+                continue
+            self.stats[path] = stat
+
+    @staticmethod
+    def template_paths(context) -> List[Path]:
+        global_config = context.global_config
+        template_dir = global_config.template_dir
+        if not template_dir.is_absolute():
+            template_dir = global_config.config_path.parent / template_dir
+        paths = [*template_dir.glob("*.yaml"), *template_dir.glob("*.yml")]
+        paths.extend(context.alias_config.resolve(alias) for alias in context.alias_config.aliases)
+        return list(dict.fromkeys(path.resolve() for path in paths))
+
+
+class DaemonServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    # request processes finish on their own when the daemon is stopped
+    block_on_close = False
+
+    def __init__(self, path: Path):
+        # only the owner can connect, requests run with permissions of the daemon
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path.as_posix(), _RequestHandler)
+        finally:
+            os.umask(umask)
+        self.warm_state = WarmState()
+
+    def service_actions(self):
+        super().service_actions()
+        self.warm_state.refresh()
+
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+
+def serve(path: Optional[Path] = None):
+    """Runs the daemon until it is terminated."""
+    from .cli import cli  # noqa: F401 - imported once for all requests
+
+    path = path or socket_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    server = DaemonServer(path)
+    pid_path(path).write_text(str(os.getpid()))
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        server.warm_state.refresh()
+        server.serve_forever(poll_interval=REFRESH_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+        pid_path(path).unlink(missing_ok=True)
+
+
+def start(timeout: float = 10.0) -> Optional[int]:
+    """Starts the daemon in background, returns its pid or None if it did not start in
+    `timeout` seconds."""
+    socket_path().parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path(), "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "devcontainer_manager", "daemon", "run"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        if running_pid() == process.pid:
+            return process.pid
+        time.sleep(0.05)
+    return None
+
+
+def stop(timeout: float = 10.0) -> Optional[int]:
+    """Stops the daemon, returns its pid or None if it was not running."""
+    pid = running_pid()
+    if pid is None:
+        return None
+    os.kill(pid, signal.SIGTERM)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and running_pid() is not None:
+        time.sleep(0.05)
+    return pid
@@ -0,0 +1,317 @@
+"""Optimization of `docker.additional_commands` for fewer layers and better build cache reuse.
+
+The optimization aims to keep the built image equivalent, but it relies on heuristics - a
+script run by `RUN` can read an environment variable without referencing it in the dockerfile,
+so review the changes with `dockerfile-diff` before enabling it:
+
+- consecutive apt and pip install steps are coalesced into one step per package manager and
+  options, packages are deduplicated, apt packages are installed before pip packages; installs
+  naming the same package with different versions are not merged
+- `LABEL` instructions and `ENV`/`ARG` instructions whose variables are not referenced by any
+  later instruction (and are not known to change behavior of commonly used tools) are moved
+  to the end of their build stage, so changing their values does not invalidate cache of the
+  following steps
+
+Other instructions are kept in their original order, `FROM` starts a new build stage and
+nothing is moved or merged across it.
+"""
+import difflib
+import re
+import shlex
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# variables read by tools without being referenced in the commands
+IMPLICIT_VARIABLES = {"PATH", "HOME", "SHELL", "USER", "LD_LIBRARY_PATH", "LD_PRELOAD", "TZ"}
+IMPLICIT_VARIABLE_PREFIXES = (
+    "LANG",
+    "LC_",
+    "DEBIAN",
+    "APT",
+    "PIP_",
+    "PYTHON",
+    "VIRTUAL_ENV",
+    "CONDA",
+    "NPM_",
+    "NODE_",
+    "HTTP_",
+    "HTTPS_",
+    "NO_PROXY",
+    "CC",
+    "CXX",
+    "CFLAGS",
+    "CPPFLAGS",
+    "LDFLAGS",
+    "PKG_CONFIG",
+    "DOCKER",
+    "BUILDKIT",
+)
+MOVABLE_INSTRUCTIONS = ("ENV", "ARG", "LABEL")
+APT_CLEANUP = ("rm -rf /var/lib/apt/lists/*", "apt-get clean")
+# pip options without values that can be shared by merged installs
+PIP_FLAGS = {
+    "--no-cache-dir",
+    "-U",
+    "--upgrade",
+    "--user",
+    "-q",
+    "--quiet",
+    "--break-system-packages",
+    "--no-warn-script-location",
+}
+PIP_COMMANDS = [
+    ("pip", "install"),
+    ("pip3", "install"),
+    ("python", "-m", "pip", "install"),
+    ("python3", "-m", "pip", "install"),
+]
+
+_INSTRUCTION_REGEX = re.compile(r"^\s*([A-Za-z]+)\s*(.*)$", re.DOTALL)
+_ENV_NAME_REGEX = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)")
+_ASSIGNMENT_REGEX = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+
+
+class Instruction(NamedTuple):
+    keyword: str
+    arguments: str
+    text: str
+
+
+class Install(NamedTuple):
+    # ("apt", env assignments, options, cleanup) or ("pip", command, options)
+    key: Tuple
+    packages: List[str]
+    # whether package lists are updated before the install (apt only)
+    update: bool = False
+
+
+def parse_instruction(command: str) -> Instruction:
+    match = _INSTRUCTION_REGEX.match(command)
+    if match is None:
+        return Instruction("", command, command)
+    return Instruction(match.group(1).upper(), match.group(2).strip(), command)
+
+
+def _shell_words(arguments: str) -> Optional[List[List[str]]]:
+    """Splits shell form `RUN` arguments into commands joined by `&&`, None if the arguments
+    use any other shell syntax."""
+    if arguments.startswith(("[", "--")):
+        # exec form or flags (e.g. --mount)
+        return None
+    arguments = re.sub(r"\\\n", " ", arguments)
+    try:
+        words = shlex.split(arguments, posix=True)
+        lexer = shlex.shlex(arguments, posix=True, punctuation_chars=True)
+        tokens = list(lexer)
+    except ValueError:
+        return None
+    operators = [t for t in tokens if t and set(t) <= set("&|;<>()")]
+    if any(t != "&&" for t in operators) or any(c in arguments for c in "$`\n#"):
+        return None
+
+    commands = [[]]
+    for word in words:
+        if word == "&&":
+            commands.append([])
+        else:
+            commands[-1].append(word)
+    return commands if all(commands) else None
+
+
+def _apt_install(commands: List[List[str]]) -> Optional[Install]:
+    env, options, packages = (), set(), []
+    cleanup = set()
+    installs = 0
+    update = False
+    for command in commands:
+        assignments = []
+        while command and _ASSIGNMENT_REGEX.match(command[0]):
+            assignments.append(command[0])
+            command = command[1:]
+        line = " ".join(command)
+        if line in APT_CLEANUP:
+            cleanup.add(line)
+        elif command[:1] in (["apt-get"], ["apt"]) and command[1:2] == ["update"]:
+            if any(not word.startswith("-") for word in command[2:]):
+                return None
+            update = True
+        elif command[:1] in (["apt-get"], ["apt"]) and "install" in command[1:]:
+            if installs and tuple(assignments) != env:
+                return None
+            env = tuple(assignments)
+            installs += 1
+            for word in command[1:]:
+                if word == "install":
+                    continue
+                if word.startswith("-"):
+                    options.add(word)
+                else:
+                    packages.append(word)
+        else:
+            return None
+    if not installs:
+        return None
+    key = ("apt", env, tuple(sorted(options)), tuple(sorted(cleanup)))
+    return Install(key, packages, update)
+
+
+def _pip_install(commands: List[List[str]]) -> Optional[Install]:
+    if len(commands) != 1:
+        return None
+    command = commands[0]
+    for prefix in PIP_COMMANDS:
+        if tuple(command[: len(prefix)]) == prefix:
+            break
+    else:
+        return None
+
+    options, packages = set(), []
+    for word in command[len(prefix) :]:
+        if word in PIP_FLAGS:
+            options.add(word)
+        elif word.startswith("-") or "/" in word or word.startswith("."):
+            # options with values, requirement files and local paths
+            return None
+        else:
+            packages.append(word)
+    if not packages:
+        return None
+    return Install(("pip", prefix, tuple(sorted(options))), packages)
+
+
+def parse_install(instruction: Instruction) -> Optional[Install]:
+    """Returns apt or pip install done by `RUN` instruction, None for any other instruction."""
+    if instruction.keyword != "RUN":
+        return None
+    commands = _shell_words(instruction.arguments)
+    if commands is None:
+        return None
+    return _apt_install(commands) or _pip_install(commands)
+
+
+def _package_name(manager: str, package: str) -> str:
+    """Returns name of `package` without version specifier (and extras)."""
+    if manager == "apt":
+        return re.split(r"[=/]", package, 1)[0]
+    name = re.match(r"[A-Za-z0-9._-]*", package).group(0)
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _conflicts(install: Install, packages: List[str]) -> bool:
+    """Returns whether `install` names any of `packages` with a different specifier."""
+    manager = install.key[0]
+    specifiers = {_package_name(manager, package): package for package in packages}
+    return any(
+        specifiers.get(_package_name(manager, package), package) != package
+        for package in install.packages
+    )
+
+
+def _render_install(key: Tuple, packages: List[str], update: bool) -> str:
+    packages = " ".join(shlex.quote(package) for package in dict.fromkeys(packages))
+    if key[0] == "apt":
+        _, env, options, cleanup = key
+        install = " ".join([*env, "apt-get", "install", *options])
+        steps = ["apt-get update"] if update else []
+        steps.extend([f"{install} {packages}", *cleanup])
+    else:
+        _, command, options = key
+        steps = [" ".join([*command, *options, packages])]
+    return "RUN " + " \\\n    && ".join(steps)
+
+
+def _variable_names(instruction: Instruction) -> List[str]:
+    if instruction.keyword == "ARG":
+        match = _ENV_NAME_REGEX.match(instruction.arguments)
+        return [match.group(1)] if match else []
+    try:
+        words = shlex.split(instruction.arguments)
+    except ValueError:
+        return []
+    if len(words) >= 2 and "=" not in words[0]:
+        # legacy `ENV NAME value` form
+        return [words[0]]
+    return [word.split("=", 1)[0] for word in words if "=" in word]
+
+
+def _is_implicit(name: str) -> bool:
+    return name.upper() in IMPLICIT_VARIABLES or name.upper().startswith(
+        IMPLICIT_VARIABLE_PREFIXES
+    )
+
+
+def _is_movable(instruction: Instruction, later: List[Instruction]) -> bool:
+    if instruction.keyword == "LABEL":
+        return True
+    names = _variable_names(instruction)
+    if not names or any(_is_implicit(name) for name in names):
+        return False
+    for other in later:
+        if other.keyword == "FROM":
+            # the rest belongs to another build stage
+            break
+        if other.keyword in ("ENV", "ARG") and set(_variable_names(other)) & set(names):
+            return False
+        if any(re.search(rf"\$\{{?{name}\b", other.text) for name in names):
+            return False
+    return True
+
+
+def optimize(commands: List[str]) -> List[str]:
+    """Returns `commands` (dockerfile instructions) optimized as described in module docs."""
+    stages: List[List[Instruction]] = [[]]
+    for instruction in map(parse_instruction, commands):
+        if instruction.keyword == "FROM" and stages[-1]:
+            stages.append([])
+        stages[-1].append(instruction)
+    return [command for stage in stages for command in _optimize_stage(stage)]
+
+
+def _optimize_stage(instructions: List[Instruction]) -> List[str]:
+    kept: List[Instruction] = []
+    moved: List[Instruction] = []
+    for i, instruction in enumerate(instructions):
+        if instruction.keyword in MOVABLE_INSTRUCTIONS and _is_movable(
+            instruction, instructions[i + 1 :]
+        ):
+            moved.append(instruction)
+        else:
+            kept.append(instruction)
+
+    result = []
+    installs: List[Install] = []
+
+    def flush():
+        # an install naming a package of the last group of its key with a different specifier
+        # starts a new group, so the later specifier is still installed last
+        groups: List[Install] = []
+        last_groups: Dict[Tuple, int] = {}
+        for install in sorted(installs, key=lambda install: install.key[0]):
+            i = last_groups.get(install.key)
+            if i is None or _conflicts(install, groups[i].packages):
+                last_groups[install.key] = i = len(groups)
+                groups.append(Install(install.key, []))
+            groups[i] = groups[i]._replace(
+                packages=[*groups[i].packages, *install.packages],
+                update=groups[i].update or install.update,
+            )
+        result.extend(_render_install(*group) for group in groups)
+        installs.clear()
+
+    for instruction in kept:
+        install = parse_install(instruction)
+        if install is not None:
+            installs.append(install)
+            continue
+        flush()
+        result.append(instruction.text)
+    flush()
+
+    result.extend(instruction.text for instruction in moved)
+    return result
+
+
+def diff(commands: List[str], name: str = "devcontainer.Dockerfile") -> str:
+    """Returns unified diff of `commands` and optimized `commands`, empty if nothing changes."""
+    before = "".join(f"{command}\n" for command in commands).splitlines(keepends=True)
+    after = "".join(f"{command}\n" for command in optimize(commands)).splitlines(keepends=True)
+    return "".join(difflib.unified_diff(before, after, name, f"{name} (optimized)"))
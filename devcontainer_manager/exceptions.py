@@ -13,3 +13,27 @@ class ConfigMovedException(Exception):
 class InvalidMountStringException(Exception):
     def __init__(self, mnt_str, *args: object) -> None:
         super().__init__(f"Mount string is invalid: '{mnt_str}'", *args)
+
+
+class TemplateReferenceCycleException(Exception):
+    def __init__(self, chain, *args: object) -> None:
+        self.chain = chain
+        super().__init__(f"Template references form a cycle: {' -> '.join(chain)}", *args)
+
+
+class BaseConfigCycleException(Exception):
+    def __init__(self, chain, *args: object) -> None:
+        self.chain = chain
+        super().__init__(f"Base configs form a cycle: {' -> '.join(chain)}", *args)
+
+
+class LockDriftException(Exception):
+    def __init__(self, lock_path, changed=(), *args: object) -> None:
+        self.changed = list(changed)
+        if self.changed:
+            message = f"'{lock_path}' is out of date, changed inputs: " + ", ".join(
+                f"'{path}'" for path in self.changed
+            )
+        else:
+            message = f"'{lock_path}' does not exist"
+        super().__init__(message, *args)
@@ -0,0 +1,289 @@
+import difflib
+import os
+import subprocess
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
+
+from . import renderer
+from .cache import GenerateCache
+from .config import Config, ResolvedConfig
+from .context import Context
+from .exceptions import (
+    ConfigDoesNotExistException,
+    InvalidArgumentException,
+    LockDriftException,
+)
+from .global_config import GlobalConfig
+from .graph import ConfigGraph
+from .layered import ConfigLayer, LayeredConfig
+from .lock import LOCK_FILENAME, Lock
+from .timing import span
+from .util import directory_lock, write_if_changed
+from .variables import GlobalVariables
+
+
+class GenerateResult(NamedTuple):
+    outputs: List[Path]
+    changed: List[Path]
+    up_to_date: bool = False
+    # files the outputs were generated from, empty if generation was skipped
+    inputs: List[Path] = []
+
+
+class Drift(NamedTuple):
+    """Output file whose content on disk differs from the generated content."""
+
+    path: Path
+    diff: str
+
+
+# generated content of output files, None for files that are deleted
+Outputs = Dict[Path, Optional[Union[str, Iterator[bytes]]]]
+
+
+class Generator:
+    """Generates devcontainer files for project in current working directory.
+
+    Configs are loaded through shared `graph`, so a single generator can be reused for multiple
+    projects without parsing shared base configs again.
+    """
+
+    def __init__(
+        self,
+        context: Context,
+        graph: Optional[ConfigGraph] = None,
+        use_cache: bool = True,
+        force_build: bool = False,
+        frozen: bool = False,
+    ):
+        self.context = context
+        self.graph = graph or ConfigGraph(Config, context.alias_config)
+        self.global_graph = ConfigGraph(GlobalConfig, context.alias_config)
+        self.cache = GenerateCache.from_settings(context.settings)
+        self.use_cache = use_cache
+        self.force_build = force_build
+        self.frozen = frozen
+
+    @property
+    def overrides_path(self) -> Path:
+        return self.context.defaults.project_path / self.context.global_config.override_config_path
+
+    @property
+    def project_path(self) -> Path:
+        return self.context.defaults.project_path.resolve()
+
+    @property
+    def config_path(self) -> Path:
+        """Path relative docker paths of the project are resolved against, independent of the
+        working directory the process started in."""
+        return self.overrides_path.absolute()
+
+    @property
+    def lock_path(self) -> Path:
+        return self.overrides_path.parent / LOCK_FILENAME
+
+    def template_paths(self, templates: Optional[List[str]] = None) -> List[Path]:
+        if not templates:
+            if not self.overrides_path.exists():
+                raise ConfigDoesNotExistException(
+                    f"Template argument not specified and '{self.overrides_path}' does not exist"
+                )
+            return [self.overrides_path]
+        with span("alias.resolve"):
+            return [self.context.alias_config.resolve(t) for t in templates]
+
+    @cached_property
+    def defaults(self) -> Config:
+        with span("defaults.load"):
+            return self.context.global_config.merge_bases(self.global_graph).defaults
+
+    def layered(
+        self, templates: Optional[List[str]] = None, variables: Optional[GlobalVariables] = None
+    ) -> LayeredConfig:
+        """Returns layered view of global defaults and base chains of all templates."""
+        layers = [ConfigLayer(self.defaults.config_path.as_posix(), self.defaults.layer())]
+        for template_path in self.template_paths(templates):
+            layers.extend(
+                ConfigLayer(node.path.as_posix(), node.config.layer())
+                for node in self.graph.chain(template_path)
+            )
+        return LayeredConfig(layers, variables=variables)
+
+    def merge(self, templates: Optional[List[str]] = None) -> Config:
+        return self.layered(templates).config
+
+    def generate(self, templates: Optional[List[str]] = None) -> GenerateResult:
+        with span("generate"), directory_lock(Path.cwd()):
+            return self._generate(templates)
+
+    def _generate(self, templates: Optional[List[str]] = None) -> GenerateResult:
+        lock = self.valid_lock(templates)
+        cache_key = self.cache.key(Path.cwd(), templates or [])
+        variables = GlobalVariables()
+        with span("cache.lookup"):
+            if self.use_cache and self.cache.lookup(cache_key, variables):
+                return GenerateResult([], [], up_to_date=True)
+
+        if lock is not None:
+            resolved_config = self.resolve(templates, lock, variables)
+            result = self.write_outputs(resolved_config, templates, list(lock.inputs))
+        else:
+            layered = self.layered(templates, variables)
+            resolved_config = layered.resolve(self.config_path)
+            config_inputs = self.config_inputs(templates)
+            result = self.write_outputs(resolved_config, templates, config_inputs)
+            if not self.frozen:
+                # overrides config written for templates is the config the lock is used for
+                lock_inputs = [*config_inputs, self.overrides_path] if templates else config_inputs
+                lock = Lock.create(lock_inputs, layered.config, self.project_path)
+
+        if lock is not None and not self.frozen:
+            changed = result.changed
+            if lock.write(self.lock_path):
+                changed = [*changed, self.lock_path]
+            result = result._replace(
+                outputs=[*result.outputs, self.lock_path], changed=changed, up_to_date=not changed
+            )
+        with span("cache.store"):
+            self.cache.store(cache_key, variables.used_values(), result.inputs, result.outputs)
+        return result
+
+    def check(self, templates: Optional[List[str]] = None) -> List[Drift]:
+        """Renders outputs in memory and returns those that differ from the files on disk,
+        nothing is written. The lock itself is not compared, it is only used if valid, same as
+        in `generate`."""
+        with span("check"):
+            resolved_config = self.resolve(templates, self.valid_lock(templates))
+            outputs = self.expected_outputs(resolved_config, templates)
+            with span("compare"):
+                drifts = [_drift(path, content) for path, content in outputs.items()]
+        return [drift for drift in drifts if drift is not None]
+
+    def resolve(
+        self,
+        templates: Optional[List[str]] = None,
+        lock: Optional[Lock] = None,
+        variables: Optional[GlobalVariables] = None,
+    ) -> ResolvedConfig:
+        """Returns resolved config of `templates`, merged config is taken from `lock` if given."""
+        if lock is None:
+            return self.layered(templates, variables).resolve(self.config_path)
+        with span("lock.load"):
+            config = lock.config()
+        with span("config.resolve"):
+            return config.resolve(variables or GlobalVariables(), self.config_path)
+
+    def valid_lock(self, templates: Optional[List[str]] = None) -> Optional[Lock]:
+        """Returns lock of the project if generating from overrides config and none of the
+        locked inputs changed. If `frozen`, raises `LockDriftException` instead of returning
+        None."""
+        if templates:
+            if self.frozen:
+                raise InvalidArgumentException("templates can not be used with frozen lock")
+            return None
+        with span("lock.validate"):
+            lock = Lock.load(self.lock_path, self.project_path)
+            changed = lock.changed_inputs() if lock is not None else []
+        if self.frozen and (lock is None or changed):
+            raise LockDriftException(self.lock_path, changed)
+        return None if changed else lock
+
+    def config_inputs(self, templates: Optional[List[str]] = None) -> List[Path]:
+        """Returns all configs the merged config of `templates` is loaded from."""
+        inputs = [
+            self.context.global_config.config_path,
+            *self.global_graph.nodes,
+            self.context.alias_config.config_path,
+            self.defaults.config_path,
+        ]
+        for template_path in self.template_paths(templates):
+            inputs.extend(self.graph.dependencies(template_path))
+        return inputs
+
+    def write_outputs(
+        self,
+        resolved_config: ResolvedConfig,
+        templates: Optional[List[str]] = None,
+        config_inputs: Optional[List[Path]] = None,
+    ) -> GenerateResult:
+        """Renders `resolved_config` and writes files that changed, `config_inputs` are
+        `config_inputs(templates)` if not given."""
+        outputs = []
+        changed = []
+        expected_outputs = self.expected_outputs(resolved_config, templates)
+        with span("write"):
+            for path, content in expected_outputs.items():
+                if content is None:
+                    if path.exists():
+                        path.unlink()
+                        changed.append(path)
+                    continue
+                path.parent.mkdir(parents=True, exist_ok=True)
+                if write_if_changed(path, content):
+                    changed.append(path)
+                outputs.append(path)
+
+        if config_inputs is None:
+            config_inputs = self.config_inputs(templates)
+        inputs = [*config_inputs, *resolved_config.dockerfile_sources]
+        return GenerateResult(outputs, changed, up_to_date=not changed, inputs=inputs)
+
+    def expected_outputs(
+        self, resolved_config: ResolvedConfig, templates: Optional[List[str]] = None
+    ) -> Outputs:
+        """Returns content of all files generated for `resolved_config` by their paths, the
+        overrides config is included only if generating from `templates`."""
+        with span("render"):
+            rendered = renderer.render(resolved_config)
+        project_path = resolved_config.project_path
+        outputs: Outputs = {
+            project_path / path: renderer.output_content(content)
+            for path, content in rendered.items()
+        }
+
+        if templates:
+            alias_config = self.context.alias_config
+            override_config = Config.none()
+            override_config.base_config = [
+                alias_config.path_to_alias(t) for t in self.template_paths(templates)
+            ]
+            outputs[self.overrides_path] = override_config.yaml()
+
+        # files generated only for some configs are deleted if not generated
+        for path in [renderer.DOCKERFILE, renderer.BUILD_SCRIPT, renderer.DOCKER_BAKE]:
+            if path not in rendered:
+                outputs[project_path / path] = None
+        return outputs
+
+    def build(self):
+        """Builds image unless it was already built from the same dockerfile and arguments."""
+        env = {**os.environ, "DEVCONTAINER_MANAGER_FORCE_BUILD": str(int(self.force_build))}
+        with span("build"):
+            subprocess.run(["bash", renderer.BUILD_SCRIPT.as_posix()], check=True, env=env)
+
+
+def _drift(path: Path, content: Optional[Union[str, Iterator[bytes]]]) -> Optional[Drift]:
+    """Returns difference of file `path` and its generated `content`, None if they are same."""
+    try:
+        existing = path.read_bytes()
+    except FileNotFoundError:
+        existing = None
+    if isinstance(content, str):
+        content = content.encode()
+    elif content is not None:
+        content = b"".join(content)
+    if existing == content:
+        return None
+
+    name = Path(os.path.relpath(path)).as_posix()
+    lines = [
+        data.decode(errors="replace").splitlines(keepends=True) if data is not None else []
+        for data in (existing, content)
+    ]
+    diff = difflib.unified_diff(
+        *lines,
+        f"a/{name}" if existing is not None else "/dev/null",
+        f"b/{name}" if content is not None else "/dev/null",
+    )
+    return Drift(path, "".join(line if line.endswith("\n") else f"{line}\n" for line in diff))
@@ -44,9 +44,8 @@ class GlobalConfig(BaseYamlConfigModelWithBase):
         return Config.parse_file(config_path)
 
     @classmethod
-    def load(
-        cls, settings: Settings = Settings(), create_if_not_exist: bool = False
-    ) -> "GlobalConfig":
+    def load(cls, settings: Settings = None, create_if_not_exist: bool = False) -> "GlobalConfig":
+        settings = settings or Settings()
         config_path = settings.global_config_path.resolve()
         if not config_path.exists():
             if create_if_not_exist:
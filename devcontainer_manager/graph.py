@@ -0,0 +1,164 @@
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Tuple, Type, Union
+
+from .exceptions import BaseConfigCycleException
+from .merge import Layer, merge_layers
+from .timing import span
+
+if TYPE_CHECKING:
+    from .alias import AliasConfig
+    from .base_config import BaseYamlConfigModelWithBase
+
+
+class ConfigNode:
+    def __init__(
+        self,
+        path: Path,
+        config: "BaseYamlConfigModelWithBase",
+        bases: List[Path],
+        parse_time: float,
+    ):
+        self.path = path
+        self.config = config
+        self.bases = bases
+        self.parse_time = parse_time
+
+    def __repr__(self) -> str:
+        return f"ConfigNode({self.path}, bases={[p.as_posix() for p in self.bases]})"
+
+
+class ConfigGraph:
+    """Graph of configs connected by their `base_config`.
+
+    Every config file (identified by its resolved path) is parsed at most once and merged
+    layers are memoized, so configs shared by multiple bases (diamonds) are parsed and merged
+    only once. Merged configs are validated only when requested by `merged`. Cycles in
+    `base_config` raise `BaseConfigCycleException`.
+    """
+
+    def __init__(
+        self,
+        config_type: Type["BaseYamlConfigModelWithBase"],
+        alias_config: "AliasConfig",
+    ):
+        self.config_type = config_type
+        self.alias_config = alias_config
+        self.nodes: Dict[Path, ConfigNode] = {}
+        self._merged: Dict[Path, "BaseYamlConfigModelWithBase"] = {}
+        self._merged_layers: Dict[Path, Layer] = {}
+        self._chains: Dict[Path, List[ConfigNode]] = {}
+        self._merging: List[Path] = []
+
+    @property
+    def edges(self) -> List[Tuple[Path, Path]]:
+        return [(node.path, base) for node in self.nodes.values() for base in node.bases]
+
+    def load(self, path: Union[str, Path]) -> ConfigNode:
+        path = Path(path).resolve()
+        node = self.nodes.get(path)
+        if node is None:
+            start = time.perf_counter()
+            with span("config.parse"):
+                config = self.config_type.parse_file(path)
+            parse_time = time.perf_counter() - start
+            node = ConfigNode(path, config, self._base_paths(config), parse_time)
+            self.nodes[path] = node
+        return node
+
+    def merged(self, path: Union[str, Path]) -> "BaseYamlConfigModelWithBase":
+        """Returns config at `path` merged with all of its bases."""
+        path = Path(path).resolve()
+        if path not in self._merged:
+            node = self.load(path)
+            if node.bases:
+                self._merged[path] = self.config_type.parse_obj(self.merged_layer(path))
+            else:
+                self._merged[path] = node.config
+        return self._merged[path]
+
+    def merged_layer(self, path: Union[str, Path]) -> Layer:
+        """Returns values of config at `path` merged with all of its bases, unvalidated."""
+        path = Path(path).resolve()
+        if path not in self._merged_layers:
+            node = self.load(path)
+            self._merged_layers[path] = self._merge_layers(path, node.config.layer(), node.bases)
+        return self._merged_layers[path]
+
+    def chain(self, path: Union[str, Path]) -> List[ConfigNode]:
+        """Returns nodes of all configs in base chain of `path` in merge order, ending with the
+        node for `path` itself. Configs shared by multiple bases appear once for every base."""
+        path = Path(path).resolve()
+        if path not in self._chains:
+            node = self.load(path)
+            self._chains[path] = [*self._base_chain(path, node.bases), node]
+        return self._chains[path]
+
+    def base_chain(self, config: "BaseYamlConfigModelWithBase") -> List[ConfigNode]:
+        """Returns nodes of all base configs of already parsed `config` in merge order."""
+        return self._base_chain(config.config_path.resolve(), self._base_paths(config))
+
+    def dependencies(self, path: Union[str, Path]) -> List[Path]:
+        """Returns `path` and paths of all configs in its base chain."""
+        dependencies = {}
+        pending = [Path(path).resolve()]
+        while pending:
+            path = pending.pop()
+            if path not in dependencies:
+                dependencies[path] = None
+                pending.extend(self.load(path).bases)
+        return list(dependencies)
+
+    def invalidate(self, paths: Iterable[Union[str, Path]]) -> Set[Path]:
+        """Drops configs at `paths` and all configs based on them, so they are parsed and merged
+        again when needed. Returns paths of dropped configs."""
+        dependents: Dict[Path, List[Path]] = {}
+        for node in self.nodes.values():
+            for base in node.bases:
+                dependents.setdefault(base, []).append(node.path)
+
+        invalid = set()
+        pending = [Path(path).resolve() for path in paths]
+        while pending:
+            path = pending.pop()
+            if path not in invalid and path in self.nodes:
+                invalid.add(path)
+                pending.extend(dependents.get(path, []))
+
+        for path in invalid:
+            for memo in [self.nodes, self._merged, self._merged_layers, self._chains]:
+                memo.pop(path, None)
+        return invalid
+
+    def merge(self, config: "BaseYamlConfigModelWithBase") -> "BaseYamlConfigModelWithBase":
+        """Merges already parsed `config` with all of its bases."""
+        bases = self._base_paths(config)
+        if not bases:
+            return config
+        layer = self._merge_layers(config.config_path.resolve(), config.layer(), bases)
+        return type(config).parse_obj(layer)
+
+    def _merge_layers(self, path: Path, layer: Layer, bases: List[Path]) -> Layer:
+        with self._visiting(path):
+            base_layers = [self.merged_layer(base) for base in bases]
+        return merge_layers([*base_layers, layer])
+
+    def _base_chain(self, path: Path, bases: List[Path]) -> List[ConfigNode]:
+        with self._visiting(path):
+            return [node for base in bases for node in self.chain(base)]
+
+    @contextmanager
+    def _visiting(self, path: Path):
+        if path in self._merging:
+            chain = self._merging[self._merging.index(path) :] + [path]
+            raise BaseConfigCycleException([p.as_posix() for p in chain])
+
+        self._merging.append(path)
+        try:
+            yield
+        finally:
+            self._merging.pop()
+
+    def _base_paths(self, config: "BaseYamlConfigModelWithBase") -> List[Path]:
+        return [path.resolve() for path in config.base_config_paths(self.alias_config)]
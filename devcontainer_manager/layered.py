@@ -0,0 +1,109 @@
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from .config import Config, ResolvedConfig
+from .exceptions import InvalidArgumentException
+from .merge import Layer, merge_layers, merge_values
+from .timing import span
+
+DEFAULT_SOURCE = "<default>"
+
+
+class ConfigLayer(NamedTuple):
+    source: str
+    values: Layer
+
+
+class FieldValue(NamedTuple):
+    value: Any
+    # (source, value) for every layer that contributed to the value, in merge order
+    sources: List[Tuple[str, Any]]
+
+
+class LayeredConfig:
+    """Stack of config layers (global defaults, base configs, overrides) merged on read.
+
+    Single fields are merged from the layers only when they are read and are cached together
+    with the layers that supplied them. The whole config is merged and validated once, when
+    `config` or `resolve` is first used.
+    """
+
+    def __init__(
+        self,
+        layers: List[ConfigLayer],
+        config_type: Type[Config] = Config,
+        variables: Optional[Mapping] = None,
+    ):
+        self.layers = layers
+        self.config_type = config_type
+        self.variables = variables
+        self._fields: Dict[str, FieldValue] = {}
+
+    def get(self, field: str) -> FieldValue:
+        """Returns merged value of dotted `field` (e.g. `devcontainer.image`), unresolved."""
+        if field not in self._fields:
+            path = self._field_path(field)
+            sources = []
+            for layer in self.layers:
+                value = _lookup(layer.values, path)
+                if value is not None:
+                    sources.append((layer.source, value))
+
+            if not sources:
+                default = _lookup(self._default_values, path)
+                self._fields[field] = FieldValue(default, [(DEFAULT_SOURCE, default)])
+            else:
+                value = merge_values([value for _, value in sources], tuple(path))
+                if not isinstance(value, (dict, list)):
+                    sources = sources[-1:]
+                self._fields[field] = FieldValue(value, sources)
+        return self._fields[field]
+
+    def resolved(self, field: str) -> Any:
+        """Returns value of dotted `field` with templates rendered."""
+        return _lookup(self._resolved_values, self._field_path(field))
+
+    @cached_property
+    def config(self) -> Config:
+        with span("config.merge"):
+            return self.config_type.parse_obj(merge_layers(layer.values for layer in self.layers))
+
+    def resolve(self, config_path: Optional[Path] = None) -> ResolvedConfig:
+        """Returns resolved config, relative docker paths are resolved relative to directory
+        of `config_path` - the project overrides config."""
+        values = dict(self._resolved_values)
+        if config_path is not None:
+            values["config_path"] = config_path
+        with span("config.resolve"):
+            return ResolvedConfig.parse_obj(values)
+
+    @cached_property
+    def _resolved_values(self) -> dict:
+        return self.config.resolved_values(self.variables)
+
+    @cached_property
+    def _default_values(self) -> dict:
+        return self.config_type().dict(exclude={"config_path"})
+
+    def _field_path(self, field: str) -> List[str]:
+        path = field.split(".")
+        model: Type[BaseModel] = self.config_type
+        for key in path:
+            model_field = model.__fields__.get(key) if model is not None else None
+            if model_field is None or key == "config_path":
+                raise InvalidArgumentException(f"unknown config field '{field}'")
+            model = model_field.outer_type_
+            if not (isinstance(model, type) and issubclass(model, BaseModel)):
+                model = None
+        return path
+
+
+def _lookup(values: Any, path: List[str]) -> Any:
+    for key in path:
+        if not isinstance(values, dict):
+            return None
+        values = values.get(key)
+    return values
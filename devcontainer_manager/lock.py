@@ -0,0 +1,114 @@
+"""Lock file recording the resolved base chain and merged config of a project.
+
+The lock is written next to the overrides config by every `generate` and lists every config
+the merged config was loaded from (global config, aliases, defaults and the whole base chain)
+with its size, modification time and content hash, together with the merged config itself.
+While none of the inputs changed, `generate` without templates uses the locked config instead
+of resolving aliases and loading the base chain again. Inputs in the project are stored
+relative to the project root, so the lock stays valid in checkouts at other paths.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Type
+
+from . import __version__
+from .config import Config
+from .util import write_if_changed
+
+LOCK_FILENAME = "devcontainer.lock"
+LOCK_VERSION = 1
+
+
+class LockedInput(NamedTuple):
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def _locked_input(path: Path) -> Optional[LockedInput]:
+    try:
+        stat = path.stat()
+        content = path.read_bytes()
+    except OSError:
+        return None
+    return LockedInput(stat.st_size, stat.st_mtime_ns, hashlib.sha256(content).hexdigest())
+
+
+def _current_input(path: Path, locked: LockedInput) -> Optional[LockedInput]:
+    """Returns `locked` if stat of `path` did not change, otherwise reads the file again."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if stat.st_size == locked.size and stat.st_mtime_ns == locked.mtime_ns:
+        return locked
+    return _locked_input(path)
+
+
+class Lock:
+    """Lock of project at `root`, `inputs` are stored by absolute paths."""
+
+    def __init__(self, inputs: Dict[Path, LockedInput], config: Dict[str, Any], root: Path):
+        self.inputs = inputs
+        self.config_values = config
+        self.root = root
+        self.touched = False
+
+    @classmethod
+    def create(cls, inputs: Iterable[Path], config: Config, root: Path) -> "Lock":
+        locked = {}
+        for path in inputs:
+            path = Path(path).resolve()
+            locked_input = _locked_input(path)
+            if locked_input is not None:
+                locked[path] = locked_input
+        return cls(locked, json.loads(config.json()), root.resolve())
+
+    @classmethod
+    def load(cls, path: Path, root: Path) -> Optional["Lock"]:
+        """Returns lock of project at `root` stored in `path` or None if it does not exist or
+        was written by another version."""
+        try:
+            content = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if content.get("lock_version") != LOCK_VERSION or content.get("version") != __version__:
+            return None
+        root = root.resolve()
+        inputs = {root / p: LockedInput(**locked) for p, locked in content["inputs"].items()}
+        return cls(inputs, content["config"], root)
+
+    def write(self, path: Path) -> bool:
+        content = {
+            "lock_version": LOCK_VERSION,
+            "version": __version__,
+            "inputs": {
+                self._stored_path(p).as_posix(): locked._asdict()
+                for p, locked in self.inputs.items()
+            },
+            "config": self.config_values,
+        }
+        return write_if_changed(path, json.dumps(content, indent=4) + "\n")
+
+    def _stored_path(self, path: Path) -> Path:
+        try:
+            return path.relative_to(self.root)
+        except ValueError:
+            return path
+
+    def changed_inputs(self) -> List[Path]:
+        """Returns inputs whose content changed. Stats of inputs that changed only their stat
+        (e.g. were touched) are updated and `touched` is set, so the lock can be rewritten."""
+        changed = []
+        for path, locked in self.inputs.items():
+            current = _current_input(path, locked)
+            if current is None or current.sha256 != locked.sha256:
+                changed.append(path)
+            elif current != locked:
+                self.inputs[path] = current
+                self.touched = True
+        return changed
+
+    def config(self, config_type: Type[Config] = Config) -> Config:
+        return config_type.parse_obj(self.config_values)
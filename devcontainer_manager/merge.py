@@ -0,0 +1,119 @@
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Sequence, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+Layer = Dict[str, Any]
+Model = TypeVar("Model", bound=BaseModel)
+FieldPath = Tuple[str, ...]
+
+
+class ReplaceList(list):
+    """List replacing the lists of previous layers instead of being merged with them (yaml tag
+    `!replace`)."""
+
+
+class RemoveList(list):
+    """List of items removed from the lists of previous layers (yaml tag `!remove`)."""
+
+
+LIST_MARKERS = (ReplaceList, RemoveList)
+
+
+def _mount_key(mount: Any) -> Hashable:
+    # mounts are parsed `MountString`s, their components are reused instead of parsing again
+    return getattr(mount, "dst", mount)
+
+
+def _item_key(item: Any) -> Hashable:
+    return item
+
+
+def _option_groups(args: List[str]) -> List[Tuple[str, ...]]:
+    """Groups command line arguments into options followed by their values, e.g.
+    `["--env", "A=1", "--gpus=all"]` into `[("--env", "A=1"), ("--gpus=all",)]`."""
+    groups = []
+    for arg in args:
+        if groups and not str(arg).startswith("-") and len(groups[-1]) == 1:
+            groups[-1] = (*groups[-1], arg)
+        else:
+            groups.append((arg,))
+    return groups
+
+
+# keys of items of list fields (by the last two components of field path) - items with the same
+# key are merged into one, the value of the last layer is kept at the position of the first,
+# lists of other fields are concatenated
+LIST_KEYS: Dict[FieldPath, Callable[[Any], Hashable]] = {
+    ("devcontainer", "mounts"): _mount_key,
+    ("devcontainer", "extensions"): _item_key,
+    ("devcontainer", "run_args"): _item_key,
+}
+# lists of these fields are merged by groups of an option and its values
+GROUPED_LISTS = {("devcontainer", "run_args")}
+
+
+def merge_lists(parts: Sequence[list], path: FieldPath = ()) -> list:
+    """Merges lists of field at `path` from left to right in linear time.
+
+    `ReplaceList` discards items of previous parts and `RemoveList` removes its items (items
+    with the same key) from them. Lists of fields in `LIST_KEYS` are deduplicated by key, other
+    lists are concatenated.
+    """
+    key = LIST_KEYS.get(path[-2:])
+    grouped = path[-2:] in GROUPED_LISTS
+    if key is None and not any(isinstance(part, LIST_MARKERS) for part in parts):
+        return parts[0] if len(parts) == 1 else [item for part in parts for item in part]
+
+    key = key or _item_key
+    merged: Dict[Hashable, Any] = {}
+    for part in parts:
+        items = _option_groups(part) if grouped else part
+        if isinstance(part, RemoveList):
+            for item in items:
+                merged.pop(key(item), None)
+            continue
+        if isinstance(part, ReplaceList):
+            merged = {}
+        for item in items:
+            merged[key(item)] = item
+
+    if grouped:
+        return [arg for group in merged.values() for arg in group]
+    return list(merged.values())
+
+
+def merge_values(values: Sequence[Any], path: FieldPath = ()) -> Any:
+    """Merges values of field at `path` from `values` of all layers that set it (not None)."""
+    last = values[-1]
+    if isinstance(last, dict):
+        return merge_layers((v for v in values if isinstance(v, dict)), path)
+    if isinstance(last, list):
+        return merge_lists([v for v in values if isinstance(v, list)], path)
+    return last
+
+
+def merge_layers(layers: Iterable[Layer], path: FieldPath = ()) -> Layer:
+    """Merges config layers from left to right.
+
+    Nested dicts are merged recursively, lists are merged by `merge_lists` and other values
+    are replaced by the last value that is not None. Layers are never modified and values
+    present in only one layer are shared with the result instead of being copied - new
+    containers are created only for keys set in multiple layers, so neither layers nor the
+    result may be mutated.
+    """
+    layers = [layer for layer in layers if layer]
+    if len(layers) <= 1:
+        return layers[0] if layers else {}
+
+    merged = {}
+    for key in dict.fromkeys(key for layer in layers for key in layer):
+        values = [layer[key] for layer in layers if layer.get(key) is not None]
+        if values:
+            merged[key] = merge_values(values, (*path, key))
+    return merged
+
+
+def merge_configs(configs: Sequence[Model], config_type: Type[Model] = None) -> Model:
+    """Merges configs from left to right, the result is validated only once."""
+    config_type = config_type or type(configs[-1])
+    return config_type.parse_obj(merge_layers(config.layer() for config in configs))
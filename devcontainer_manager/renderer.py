@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+import shlex
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Union
+
+import jinja2
+
+from .config import ResolvedConfig
+from .dockerfile import optimize as optimize_commands
+from .exceptions import InvalidArgumentException
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+DEVCONTAINER_DIR = Path(".devcontainer")
+
+DEVCONTAINER_JSON = DEVCONTAINER_DIR / "devcontainer.json"
+DOCKERFILE = DEVCONTAINER_DIR / "devcontainer.Dockerfile"
+BUILD_SCRIPT = DEVCONTAINER_DIR / "build.sh"
+DOCKER_BAKE = DEVCONTAINER_DIR / "docker-bake.json"
+
+FINGERPRINT_LABEL = "devcontainer_manager.fingerprint"
+CHUNK_SIZE = 64 * 1024
+
+environment = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(TEMPLATE_DIR.as_posix()),
+    keep_trailing_newline=True,
+    undefined=jinja2.StrictUndefined,
+)
+environment.filters["quote"] = shlex.quote
+
+
+def devcontainer_json(config: ResolvedConfig) -> Dict[str, Any]:
+    devcontainer = config.devcontainer
+    content = {
+        "name": devcontainer.name,
+        "workspaceMount": devcontainer.workspace_mount,
+        "workspaceFolder": devcontainer.workspace_folder.as_posix(),
+    }
+    if devcontainer.mounts:
+        content["mounts"] = list(devcontainer.mounts)
+    content["image"] = devcontainer.image
+    if devcontainer.user_env_probe is not None:
+        content["userEnvProbe"] = devcontainer.user_env_probe
+    content["runArgs"] = [
+        "--name",
+        devcontainer.container_name,
+        "--hostname",
+        devcontainer.container_hostname,
+        *devcontainer.run_args,
+    ]
+    if devcontainer.extensions:
+        content["customizations"] = {"vscode": {"extensions": list(devcontainer.extensions)}}
+    if devcontainer.shutdown_action is not None:
+        content["shutdownAction"] = devcontainer.shutdown_action
+
+    for option in devcontainer.additional_options:
+        try:
+            content.update(json.loads(f"{{{option}}}"))
+        except ValueError as e:
+            raise InvalidArgumentException(
+                f"invalid value in 'devcontainer.additional_options' - '{option}' is not "
+                f"a valid json object member: {e}"
+            )
+    return content
+
+
+def dockerfile_commands(config: ResolvedConfig) -> List[str]:
+    """Returns `docker.additional_commands`, optimized if `docker.optimize` is set."""
+    if config.docker.optimize:
+        return optimize_commands(config.docker.additional_commands)
+    return config.docker.additional_commands
+
+
+def build_arguments(config: ResolvedConfig) -> List[str]:
+    return ["--ssh", "default", "-t", config.devcontainer.image]
+
+
+def bake_target_name(config: ResolvedConfig) -> str:
+    return re.sub(r"[^a-zA-Z0-9_-]", "-", config.devcontainer.name)
+
+
+def bake_file(config: ResolvedConfig, fingerprint: str) -> Dict[str, Any]:
+    """Returns bake file with a single target building the devcontainer image, paths are
+    relative to the project root (where `build.sh` runs the bake)."""
+    target = {
+        "context": ".",
+        "dockerfile": DOCKERFILE.as_posix(),
+        "tags": [config.devcontainer.image],
+        "labels": {FINGERPRINT_LABEL: fingerprint},
+        "ssh": ["default"],
+        # load the image into the local image store also with the docker-container driver
+        # (needed by cache exporters such as type=local), so the devcontainer can use it
+        "output": ["type=docker"],
+    }
+    if config.docker.cache_from:
+        target["cache-from"] = list(config.docker.cache_from)
+    if config.docker.cache_to:
+        target["cache-to"] = list(config.docker.cache_to)
+    name = bake_target_name(config)
+    return {"group": {"default": {"targets": [name]}}, "target": {name: target}}
+
+
+class StreamedFile(NamedTuple):
+    """Output concatenated from `sources` (each followed by a newline) and `suffix`.
+
+    Sources are copied in chunks when the output is written, so they are never held in memory
+    and their content is not interpreted as a template.
+    """
+
+    sources: List[Path]
+    suffix: str
+
+    def chunks(self) -> Iterator[bytes]:
+        for source in self.sources:
+            with open(source, "rb") as f:
+                # small files are read at once without allocating a whole chunk
+                chunk_size = max(min(CHUNK_SIZE, os.fstat(f.fileno()).st_size), 1)
+                yield from iter(lambda: f.read(chunk_size), b"")
+            yield b"\n"
+        yield self.suffix.encode()
+
+
+Output = Union[str, StreamedFile]
+
+
+def build_fingerprint(dockerfile: Iterable[bytes], arguments: List[str]) -> str:
+    """Returns fingerprint of image built from `dockerfile` chunks with `arguments`, files in
+    build context are not included."""
+    digest = hashlib.sha256()
+    for chunk in dockerfile:
+        digest.update(chunk)
+    digest.update(json.dumps(arguments).encode())
+    return digest.hexdigest()
+
+
+def render(config: ResolvedConfig) -> Dict[Path, Output]:
+    """Renders devcontainer files for `config`.
+
+    Returns mapping from output paths (relative to `config.project_path`) to their contents,
+    dockerfile and build script are rendered only if `docker.file` is set. Dockerfile is
+    returned as `StreamedFile` of the base dockerfile and included fragments followed by
+    `dockerfile_commands`. Build script stamps the image with fingerprint of the dockerfile and
+    build arguments and skips the build if the existing image has the same fingerprint. Bake
+    file is rendered only if `docker.bake` is set.
+    """
+    content = json.dumps(devcontainer_json(config), indent=4, ensure_ascii=False)
+    outputs = {DEVCONTAINER_JSON: content + "\n"}
+    if config.docker.file is not None:
+        dockerfile = StreamedFile(
+            config.dockerfile_sources,
+            environment.get_template(DOCKERFILE.name).render(commands=dockerfile_commands(config)),
+        )
+        arguments = build_arguments(config)
+        fingerprint = build_fingerprint(dockerfile.chunks(), arguments)
+        outputs[DOCKERFILE] = dockerfile
+        outputs[BUILD_SCRIPT] = environment.get_template(BUILD_SCRIPT.name).render(
+            config=config,
+            arguments=arguments,
+            fingerprint=fingerprint,
+            fingerprint_label=FINGERPRINT_LABEL,
+            bake_file=DOCKER_BAKE.as_posix(),
+        )
+        if config.docker.bake:
+            outputs[DOCKER_BAKE] = json.dumps(bake_file(config, fingerprint), indent=4) + "\n"
+    return outputs
+
+
+def output_content(output: Output) -> Union[str, Iterator[bytes]]:
+    """Returns content of rendered output for `util.write_if_changed`."""
+    return output.chunks() if isinstance(output, StreamedFile) else output
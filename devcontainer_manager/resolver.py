@@ -0,0 +1,152 @@
+from functools import lru_cache
+from pathlib import PurePath
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+import jinja2
+from jinja2 import nodes
+
+from .exceptions import TemplateReferenceCycleException
+
+TEMPLATE_MARKERS = ("{{", "{%")
+
+FieldPath = Tuple[str, ...]
+
+environment = jinja2.Environment(undefined=jinja2.StrictUndefined)
+
+
+def has_template(value: Any) -> bool:
+    if not isinstance(value, (str, PurePath)):
+        return False
+    value = str(value)
+    return any(marker in value for marker in TEMPLATE_MARKERS)
+
+
+@lru_cache(maxsize=None)
+def compile_template(source: str) -> jinja2.Template:
+    return environment.from_string(source)
+
+
+@lru_cache(maxsize=None)
+def find_references(source: str) -> FrozenSet[FieldPath]:
+    """Returns paths of all variables referenced in template, e.g. `{{ devcontainer.name }}`
+    yields `("devcontainer", "name")`. Attribute chains are followed as far as they are static.
+    """
+    ast = environment.parse(source)
+    references = set()
+    visited = set()
+    for node in ast.find_all((nodes.Getattr, nodes.Getitem)):
+        if id(node) in visited:
+            continue
+        path = []
+        current = node
+        while isinstance(current, (nodes.Getattr, nodes.Getitem)):
+            visited.add(id(current))
+            if isinstance(current, nodes.Getattr):
+                path.insert(0, current.attr)
+            elif isinstance(current.arg, nodes.Const):
+                path.insert(0, str(current.arg.value))
+            else:
+                path.clear()
+            current = current.node
+        if isinstance(current, nodes.Name) and current.ctx == "load":
+            visited.add(id(current))
+            references.add((current.name, *path))
+
+    for node in ast.find_all(nodes.Name):
+        if node.ctx == "load" and id(node) not in visited:
+            references.add((node.name,))
+
+    return frozenset(references)
+
+
+def render_template_values(values: Dict[str, Any], variables: Optional[Mapping] = None) -> dict:
+    """Renders every templated string in nested `values` exactly once.
+
+    Fields are rendered in dependency order, so a template can reference other (templated)
+    fields by their dotted path. Values from `variables` are available to every template and
+    take precedence over fields with the same name, only values of variables referenced by
+    some template are read from the mapping.
+    """
+    variables = variables or {}
+    resolved = _copy_containers(values)
+    templated = dict(_find_templated_fields(resolved))
+    if not templated:
+        return resolved
+
+    prefixes: Dict[FieldPath, List[FieldPath]] = {}
+    for path in templated:
+        for i in range(1, len(path) + 1):
+            prefixes.setdefault(path[:i], []).append(path)
+
+    dependencies = {}
+    used_variables = {}
+    for path, source in templated.items():
+        path_dependencies = []
+        for reference in find_references(source):
+            if reference[0] in variables:
+                if reference[0] not in used_variables:
+                    used_variables[reference[0]] = variables[reference[0]]
+                continue
+            path_dependencies.extend(prefixes.get(reference, []))
+            path_dependencies.extend(
+                reference[:i] for i in range(1, len(reference)) if reference[:i] in templated
+            )
+        dependencies[path] = path_dependencies
+
+    for path in _topological_order(dependencies):
+        context = {**resolved, **used_variables}
+        rendered = compile_template(templated[path]).render(context)
+        _set_value(resolved, path, rendered)
+
+    return resolved
+
+
+def _copy_containers(value):
+    if isinstance(value, dict):
+        return {k: _copy_containers(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_containers(v) for v in value]
+    return value
+
+
+def _find_templated_fields(value, path: FieldPath = ()):
+    if isinstance(value, dict):
+        for k, v in value.items():
+            yield from _find_templated_fields(v, (*path, str(k)))
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            yield from _find_templated_fields(v, (*path, str(i)))
+    elif has_template(value):
+        yield path, str(value)
+
+
+def _set_value(values, path: FieldPath, value):
+    for key in path[:-1]:
+        values = values[int(key)] if isinstance(values, list) else values[key]
+    if isinstance(values, list):
+        values[int(path[-1])] = value
+    else:
+        values[path[-1]] = value
+
+
+def _topological_order(dependencies: Dict[FieldPath, List[FieldPath]]) -> List[FieldPath]:
+    order = []
+    done = set()
+    visiting: Dict[FieldPath, None] = {}
+
+    def visit(path):
+        if path in done:
+            return
+        if path in visiting:
+            chain = [*visiting][[*visiting].index(path) :] + [path]
+            raise TemplateReferenceCycleException([".".join(p) for p in chain])
+        visiting[path] = None
+        for dependency in dependencies[path]:
+            visit(dependency)
+        visiting.pop(path)
+        done.add(path)
+        order.append(path)
+
+    for path in dependencies:
+        visit(path)
+    return order
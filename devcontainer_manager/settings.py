@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 
 from pydantic import BaseSettings
 
@@ -6,11 +7,28 @@ from pydantic import BaseSettings
 class Settings(BaseSettings):
     global_config_filename = "config.yaml"
     global_config_dir = Path().home() / ".devcontainer_manager"
+    cache_max_entries = 256
+    # number of parsed configs kept in snapshot cache, 0 disables the cache
+    snapshot_max_entries = 1024
+    # yaml library used for loading configs - "c" (libyaml, if available) or "pure"
+    yaml_backend = "c"
+    # print phase timings of `generate` - "table" or "json" (json lines)
+    timings: Optional[str] = None
+    # write cProfile stats of `generate` to this file
+    profile: Optional[Path] = None
 
     @property
     def global_config_path(self):
         return self.global_config_dir / self.global_config_filename
 
+    @property
+    def cache_dir(self):
+        return self.global_config_dir / "cache"
+
+    @property
+    def snapshot_dir(self):
+        return self.global_config_dir / "snapshots"
+
     class Config:
         env_prefix = "devcontainer_manager_"
         case_insensitive = True
@@ -0,0 +1,25 @@
+#!/usr/bin/env bash
+
+CWD=$(readlink -e "$(dirname "$0")")
+cd $CWD/.. || exit $?
+
+IMAGE={{ config.devcontainer.image | quote }}
+FINGERPRINT={{ fingerprint }}
+
+if [ "${DEVCONTAINER_MANAGER_FORCE_BUILD:-0}" != 1 ]; then
+    IMAGE_FINGERPRINT=$(docker image inspect \
+        --format '{% raw %}{{ index .Config.Labels "{% endraw %}{{ fingerprint_label }}{% raw %}" }}{% endraw %}' \
+        "$IMAGE" 2>/dev/null)
+    if [ "$IMAGE_FINGERPRINT" = "$FINGERPRINT" ]; then
+        echo "Image '$IMAGE' is up to date"
+        exit 0
+    fi
+fi
+
+{% if config.docker.bake -%}
+docker buildx bake -f {{ bake_file }} || exit $?
+{% else -%}
+DOCKER_BUILDKIT=1 docker build -f .devcontainer/devcontainer.Dockerfile \
+    --label {{ fingerprint_label }}=$FINGERPRINT \
+    {{ arguments | map("quote") | join(" ") }} . || exit $?
+{% endif -%}
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from devcontainer_manager.batch import find_projects, generate_projects
+from devcontainer_manager.context import get_context
+from devcontainer_manager.generator import GenerateResult, Generator
+from devcontainer_manager.renderer import DOCKERFILE
+from devcontainer_manager.settings import Settings
+from devcontainer_manager.util import working_directory
+
+OVERRIDES_PATH = Path(".devcontainer/overrides.yaml")
+
+
+class FakeGenerator:
+    def merge(self, templates):
+        pass
+
+    def generate(self, templates):
+        if Path.cwd().name == "broken":
+            raise ValueError("broken config")
+        return GenerateResult([], [], up_to_date=Path.cwd().name == "cached")
+
+
+@pytest.fixture(scope="function")
+def projects_dir(tmp_path):
+    for name in ["a", "broken", "cached"]:
+        (tmp_path / name / OVERRIDES_PATH).parent.mkdir(parents=True)
+        (tmp_path / name / OVERRIDES_PATH).write_text("")
+    (tmp_path / "not-a-project").mkdir()
+    return tmp_path
+
+
+def test_find_projects_in_directory_and_manifest(projects_dir):
+    manifest = projects_dir / "projects.txt"
+    manifest.write_text("# projects\na\n\nnot-a-project\n")
+
+    assert find_projects([projects_dir], OVERRIDES_PATH) == [
+        projects_dir / name for name in ["a", "broken", "cached"]
+    ]
+    assert find_projects([projects_dir / "a", manifest], OVERRIDES_PATH) == [
+        projects_dir / "a",
+        projects_dir / "a",
+        projects_dir / "not-a-project",
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_generate_projects_reports_status_per_project(projects_dir, jobs):
+    projects = find_projects([projects_dir], OVERRIDES_PATH)
+
+    results = list(generate_projects(FakeGenerator(), projects, jobs=jobs))
+
+    assert [(r.project_dir.name, r.status, r.message) for r in results] == [
+        ("a", "generated", ""),
+        ("broken", "failed", "broken config"),
+        ("cached", "up to date", ""),
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_generate_projects_resolves_docker_paths_per_project(tmp_path, jobs):
+    settings = Settings(global_config_dir=tmp_path / "global", snapshot_max_entries=0)
+    generator = Generator(get_context(settings, create_if_not_exist=True), use_cache=False)
+    for name in ["a", "b"]:
+        (tmp_path / name / OVERRIDES_PATH).parent.mkdir(parents=True)
+        (tmp_path / name / OVERRIDES_PATH).write_text("docker:\n    file: ../Dockerfile.base\n")
+        (tmp_path / name / "Dockerfile.base").write_text(f"FROM {name}\n")
+    projects = find_projects([tmp_path], OVERRIDES_PATH)
+
+    with working_directory(tmp_path):
+        results = list(generate_projects(generator, projects, jobs=jobs))
+
+    assert [(r.project_dir.name, r.status, r.message) for r in results] == [
+        ("a", "generated", ""),
+        ("b", "generated", ""),
+    ]
+    for name in ["a", "b"]:
+        assert (tmp_path / name / DOCKERFILE).read_text().startswith(f"FROM {name}\n")
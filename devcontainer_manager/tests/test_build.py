@@ -0,0 +1,149 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from devcontainer_manager.batch import bake_projects
+from devcontainer_manager.config import ResolvedConfig
+from devcontainer_manager.renderer import (
+    BUILD_SCRIPT,
+    DOCKER_BAKE,
+    DOCKERFILE,
+    output_content,
+    render,
+)
+from devcontainer_manager.util import write_if_changed
+
+STUB_DOCKER = """#!/usr/bin/env bash
+echo "$1" >> "{log}"
+case "$1" in
+    image)
+        cat "{labels}/${{@: -1}}" 2>/dev/null || exit 1
+        ;;
+    build)
+        while [ $# -gt 0 ]; do
+            case "$1" in
+                -t) image=$2 ;;
+                devcontainer_manager.fingerprint=*) fingerprint=${{1#*=}} ;;
+            esac
+            shift
+        done
+        echo "$fingerprint" > "{labels}/$image"
+        ;;
+    buildx)
+        cp "$4" "{baked}"
+        "{python}" -c "$BAKE" "$4" "{labels}"
+        ;;
+esac
+"""
+
+# writes fingerprint labels of all tags of targets in bake file argv[1] to directory argv[2]
+STUB_BAKE = """
+import json, sys
+for target in json.load(open(sys.argv[1]))["target"].values():
+    for tag in target["tags"]:
+        with open(sys.argv[2] + "/" + tag, "w") as f:
+            print(target["labels"]["devcontainer_manager.fingerprint"], file=f)
+"""
+
+
+@pytest.fixture(scope="function")
+def docker_log(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    labels = tmp_path / "labels"
+    labels.mkdir()
+    log = tmp_path / "docker.log"
+    docker = bin_dir / "docker"
+    docker.write_text(
+        STUB_DOCKER.format(
+            log=log, labels=labels, baked=tmp_path / "baked.json", python=sys.executable
+        )
+    )
+    docker.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("BAKE", STUB_BAKE)
+    return log
+
+
+def write_project(tmp_path, dockerfile, name="project", **docker):
+    (tmp_path / "Dockerfile").write_text(dockerfile)
+    config = ResolvedConfig(
+        project_path=tmp_path / name,
+        devcontainer=dict(name=name, image=f"{name}-dev"),
+        docker=dict(file=tmp_path / "Dockerfile", **docker),
+    )
+    for path, output in render(config).items():
+        path = config.project_path / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_if_changed(path, output_content(output))
+    return config.project_path / BUILD_SCRIPT
+
+
+def build(script, force=False):
+    env = {**os.environ, "DEVCONTAINER_MANAGER_FORCE_BUILD": str(int(force))}
+    subprocess.run(["bash", script], check=True, env=env, stdout=subprocess.DEVNULL)
+
+
+def calls(log):
+    return log.read_text().split()
+
+
+def baked_targets(tmp_path):
+    return json.loads((tmp_path / "baked.json").read_text())["target"]
+
+
+def test_build_is_skipped_if_fingerprint_matches(tmp_path, docker_log):
+    script = write_project(tmp_path, "FROM ubuntu\n")
+
+    build(script)
+    assert calls(docker_log) == ["image", "build"]
+
+    build(script)
+    assert calls(docker_log) == ["image", "build", "image"]
+
+    build(script, force=True)
+    assert calls(docker_log) == ["image", "build", "image", "build"]
+
+    write_project(tmp_path, "FROM debian\n")
+    build(script)
+    assert calls(docker_log) == ["image", "build", "image", "build", "image", "build"]
+
+
+def test_build_with_bake(tmp_path, docker_log):
+    script = write_project(
+        tmp_path, "FROM ubuntu\n", bake=True, cache_from=["type=local,src=/tmp/cache"]
+    )
+
+    build(script)
+    assert calls(docker_log) == ["image", "buildx"]
+    target = baked_targets(tmp_path)["project"]
+    assert target["tags"] == ["project-dev"]
+    assert target["output"] == ["type=docker"]
+    assert target["dockerfile"] == DOCKERFILE.as_posix()
+    assert target["cache-from"] == ["type=local,src=/tmp/cache"]
+    assert "cache-to" not in target
+
+    build(script)
+    assert calls(docker_log) == ["image", "buildx", "image"]
+
+
+def test_bake_projects_builds_outdated_images_in_single_bake(tmp_path, docker_log):
+    project_dirs = []
+    for name in ["a", "b", "c"]:
+        write_project(tmp_path, "FROM ubuntu\n", name=name, bake=name != "c")
+        project_dirs.append(tmp_path / name)
+    assert not (tmp_path / "c" / DOCKER_BAKE).exists()
+
+    assert bake_projects(project_dirs) == ["a", "b"]
+    assert calls(docker_log).count("buildx") == 1
+    target = baked_targets(tmp_path)["b"]
+    assert target["context"] == (tmp_path / "b").as_posix()
+    assert target["dockerfile"] == (tmp_path / "b" / DOCKERFILE).as_posix()
+    assert target["output"] == ["type=docker"]
+
+    assert bake_projects(project_dirs) == []
+    assert bake_projects(project_dirs, force=True) == ["a", "b"]
+    assert calls(docker_log).count("buildx") == 2
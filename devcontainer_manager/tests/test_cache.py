@@ -0,0 +1,114 @@
+import os
+
+import pytest
+from pydantic import BaseModel
+
+from devcontainer_manager.cache import GenerateCache, SnapshotCache, set_snapshot_cache
+from devcontainer_manager.config import Config
+
+
+@pytest.fixture(scope="function")
+def cache(tmp_path):
+    return GenerateCache(tmp_path / "cache", max_entries=2)
+
+
+@pytest.fixture(scope="function")
+def files(tmp_path):
+    input_path = tmp_path / "input.yaml"
+    output_path = tmp_path / "output.json"
+    input_path.write_text("input")
+    output_path.write_text("output")
+    return input_path, output_path
+
+
+def test_cache_hit_when_nothing_changed(cache, files):
+    input_path, output_path = files
+    cache.store("key", {"login": "user"}, [input_path], [output_path])
+
+    assert cache.lookup("key", {"login": "user"})
+    assert not cache.lookup("other-key", {"login": "user"})
+
+
+@pytest.mark.parametrize("changed", ["input", "output", "variables"])
+def test_cache_miss_when_anything_changed(cache, files, changed):
+    input_path, output_path = files
+    variables = {"login": "user"}
+    cache.store("key", variables, [input_path], [output_path])
+
+    if changed == "input":
+        input_path.write_text("changed")
+    elif changed == "output":
+        output_path.unlink()
+    else:
+        variables = {"login": "other"}
+
+    assert not cache.lookup("key", variables)
+
+
+def test_cache_evicts_least_recently_used(cache, files):
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.store(key, {}, [files[0]], [files[1]])
+        os.utime(cache.cache_dir / f"{key}.json", (i, i))
+        cache.evict()
+
+    assert sorted(p.stem for p in cache.cache_dir.iterdir()) == ["b", "c"]
+
+
+@pytest.fixture(scope="function")
+def snapshot_cache(tmp_path):
+    snapshot_cache = SnapshotCache(tmp_path / "snapshots", max_entries=2)
+    set_snapshot_cache(snapshot_cache)
+    yield snapshot_cache
+    set_snapshot_cache(None)
+
+
+def test_snapshot_cache_skips_parsing_unchanged_config(snapshot_cache, tmp_path, monkeypatch):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("devcontainer:\n  name: test\n  mounts:\n    - /src:/dst\n")
+    config = Config.parse_file(config_path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("config parsed again")
+
+    monkeypatch.setattr(BaseModel, "parse_file", fail)
+    cached = Config.parse_file(config_path)
+    assert cached == config
+    assert cached is not config
+    assert cached.config_path == config_path.absolute()
+    assert cached.devcontainer.mounts[0].dst == "/dst"
+
+    # entries are kept in memory as well
+    for entry_path in snapshot_cache.cache_dir.iterdir():
+        entry_path.unlink()
+    assert Config.parse_file(config_path) == config
+
+    monkeypatch.undo()
+    config_path.write_text("devcontainer:\n  name: changed\n")
+    assert Config.parse_file(config_path).devcontainer.name == "changed"
+
+
+def test_snapshot_cache_evicts_least_recently_used(snapshot_cache, tmp_path):
+    paths = []
+    for name in ["a", "b", "c"]:
+        path = tmp_path / f"{name}.yaml"
+        path.write_text(f"devcontainer:\n  name: {name}\n")
+        Config.parse_file(path)
+        paths.append(path)
+
+    assert len(list(snapshot_cache.cache_dir.iterdir())) == 2
+    assert snapshot_cache.lookup(snapshot_cache.key(Config, paths[0], False)) is None
+    assert snapshot_cache.lookup(snapshot_cache.key(Config, paths[2], False)) is not None
+
+
+def test_snapshot_key_depends_on_model_fields(tmp_path):
+    class Model(BaseModel):
+        a: int = 0
+
+    class ChangedModel(BaseModel):
+        a: str = ""
+
+    ChangedModel.__qualname__ = Model.__qualname__
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("a: 1\n")
+
+    assert SnapshotCache.key(Model, config_path) != SnapshotCache.key(ChangedModel, config_path)
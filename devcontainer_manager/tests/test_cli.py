@@ -18,7 +18,7 @@ def runner():
 def global_settings(tmp_path):
     data_path = tmp_path / "global"
     data_path.mkdir(exist_ok=True, parents=True)
-    os.environ[f"{Settings.Config.env_prefix}_{'global_config_dir'}"] = data_path.as_posix()
+    os.environ[f"{Settings.Config.env_prefix}global_config_dir"] = data_path.as_posix()
     return Settings()
 
 
@@ -57,3 +57,33 @@ def test_cli_create_template_command_config_force_recreate(
 
     assert result.exit_code == 0
     assert Config.parse_file(config_path) == Config()
+
+
+def _tree(path):
+    return {p: (p.read_bytes(), p.stat().st_mtime_ns) for p in path.rglob("*") if p.is_file()}
+
+
+def test_cli_generate_check_reports_drift_without_writing(
+    tmp_path, runner, monkeypatch, global_settings
+):
+    template = tmp_path / "template.yaml"
+    template.write_text("devcontainer:\n    name: before\n")
+    assert runner.invoke(app, ["alias", "add", "template", template.as_posix()]).exit_code == 0
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    monkeypatch.chdir(project_dir)
+
+    assert runner.invoke(app, ["generate", "template"]).exit_code == 0
+    assert runner.invoke(app, ["generate", "--check"]).exit_code == 0
+
+    template.write_text("devcontainer:\n    name: after\n")
+    devcontainer_dir = project_dir / ".devcontainer"
+    files = {path: path.read_bytes() for path in devcontainer_dir.iterdir()}
+    global_files = _tree(global_settings.global_config_dir)
+    result = runner.invoke(app, ["generate", "--diff"])
+
+    assert result.exit_code == 1
+    assert '-    "name": "before",\n+    "name": "after",' in result.output
+    assert {path: path.read_bytes() for path in devcontainer_dir.iterdir()} == files
+    # snapshots of parsed configs are not written either
+    assert _tree(global_settings.global_config_dir) == global_files
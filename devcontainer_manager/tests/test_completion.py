@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from devcontainer_manager.completion import load_aliases, read_index
+from devcontainer_manager.context import get_context
+from devcontainer_manager.settings import Settings
+
+
+@pytest.fixture(scope="function")
+def context(tmp_path):
+    global_config_dir = tmp_path / "global"
+    os.environ[f"{Settings.Config.env_prefix}global_config_dir"] = global_config_dir.as_posix()
+    return get_context(Settings(), create_if_not_exist=True)
+
+
+def test_alias_writes_update_index(context):
+    context.alias_config.aliases["python"] = "templates/python.yaml"
+    context.write_alias_config()
+
+    assert read_index(context.alias_config.config_path) == {"python": "templates/python.yaml"}
+    assert load_aliases() == {"python": "templates/python.yaml"}
+
+
+def test_stale_index_is_rebuilt(context):
+    alias_path = context.alias_config.config_path
+    context.write_alias_config()
+    alias_path.write_text("aliases:\n    rust: templates/rust.yaml\n")
+    os.utime(alias_path, ns=(0, 0))
+
+    assert read_index(alias_path) is None
+    assert load_aliases() == {"rust": "templates/rust.yaml"}
+    assert read_index(alias_path) == {"rust": "templates/rust.yaml"}
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from devcontainer_manager.context import get_context
+from devcontainer_manager.settings import Settings
+
+
+@pytest.fixture(scope="function")
+def settings(tmp_path):
+    return Settings(global_config_dir=tmp_path / "global")
+
+
+def test_get_context_loads_once(settings):
+    context = get_context(settings, create_if_not_exist=True)
+
+    assert get_context(settings) is context
+    assert context.global_config.config_path == settings.global_config_path
+    assert context.alias_config.aliases == {}
+
+
+def test_get_context_reloads_changed_files(settings):
+    context = get_context(settings, create_if_not_exist=True)
+    alias_path = context.alias_config.config_path
+    alias_path.write_text("aliases:\n    python: templates/python.yaml\n")
+    os.utime(alias_path, ns=(0, 0))
+
+    reloaded = get_context(settings)
+
+    assert reloaded is not context
+    assert reloaded.alias_config.is_alias("python")
+
+
+def test_get_context_keeps_own_alias_writes(settings):
+    context = get_context(settings, create_if_not_exist=True)
+    context.alias_config.aliases["python"] = "templates/python.yaml"
+    context.write_alias_config()
+
+    assert get_context(settings) is context
@@ -0,0 +1,105 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from devcontainer_manager import __version__
+from devcontainer_manager.daemon import NO_DAEMON_ENV, DaemonServer, forward, serve
+from devcontainer_manager.renderer import DOCKERFILE
+from devcontainer_manager.util import working_directory
+
+
+@pytest.fixture(scope="function")
+def daemon_socket(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVCONTAINER_MANAGER_GLOBAL_CONFIG_DIR", (tmp_path / "global").as_posix())
+    monkeypatch.delenv(NO_DAEMON_ENV, raising=False)
+    path = tmp_path / "daemon.sock"
+    server = DaemonServer(path)
+    thread = threading.Thread(target=server.serve_forever, kwargs=dict(poll_interval=0.05))
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_forward_runs_command_in_daemon(daemon_socket, capfd):
+    assert forward(["--version"], path=daemon_socket) == 0
+    assert capfd.readouterr().out == f"{__version__}\n"
+
+
+def test_forward_uses_client_working_directory_and_environment(tmp_path, daemon_socket):
+    template = tmp_path / "template.yaml"
+    template.write_text("devcontainer:\n    name: forwarded\n")
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+
+    assert forward(["alias", "add", "template", template.as_posix()], path=daemon_socket) == 0
+    assert (tmp_path / "global" / "aliases.yaml").exists()
+
+    with working_directory(project_dir):
+        assert forward(["generate", "template"], path=daemon_socket) == 0
+        devcontainer = json.loads((project_dir / ".devcontainer/devcontainer.json").read_text())
+        assert devcontainer["name"] == "forwarded"
+        assert forward(["generate"], path=daemon_socket) == 0
+
+    # overrides config does not exist in other directory
+    with working_directory(tmp_path):
+        assert forward(["generate"], path=daemon_socket) == 1
+
+
+def test_forward_falls_back_to_in_process(tmp_path, daemon_socket, monkeypatch):
+    assert forward(["--version"], path=tmp_path / "missing.sock") is None
+    assert forward(["daemon", "status"], path=daemon_socket) is None
+
+    monkeypatch.setenv(NO_DAEMON_ENV, "1")
+    assert forward(["--version"], path=daemon_socket) is None
+
+
+def test_forward_uses_client_settings(tmp_path, daemon_socket, monkeypatch):
+    # yaml backend chosen by settings of the daemon
+    monkeypatch.setattr("devcontainer_manager.yaml._backend", "c")
+    monkeypatch.setenv("DEVCONTAINER_MANAGER_YAML_BACKEND", "invalid")
+    project_dir = tmp_path / "project"
+    (project_dir / ".devcontainer").mkdir(parents=True)
+    (project_dir / ".devcontainer" / "overrides.yaml").write_text("devcontainer:\n  name: a\n")
+
+    with working_directory(project_dir):
+        assert forward(["generate"], path=daemon_socket) == 1
+
+
+def _serve_in(directory, path):
+    os.chdir(directory)
+    serve(path)
+
+
+def test_forward_resolves_docker_paths_in_client_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEVCONTAINER_MANAGER_GLOBAL_CONFIG_DIR", (tmp_path / "global").as_posix())
+    monkeypatch.delenv(NO_DAEMON_ENV, raising=False)
+    project_dir = tmp_path / "project"
+    (project_dir / ".devcontainer").mkdir(parents=True)
+    (project_dir / ".devcontainer" / "overrides.yaml").write_text(
+        "docker:\n    file: ../Dockerfile.base\n"
+    )
+    (project_dir / "Dockerfile.base").write_text("FROM project\n")
+    (tmp_path / "daemon").mkdir()
+
+    path = tmp_path / "daemon.sock"
+    daemon = multiprocessing.get_context("fork").Process(
+        target=_serve_in, args=(tmp_path / "daemon", path)
+    )
+    daemon.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        with working_directory(project_dir):
+            assert forward(["generate"], path=path) == 0
+    finally:
+        daemon.terminate()
+        daemon.join()
+    assert (project_dir / DOCKERFILE).read_text().startswith("FROM project\n")
@@ -0,0 +1,103 @@
+from devcontainer_manager.dockerfile import diff, optimize
+
+APT = "RUN apt-get update && apt-get install -y {} && rm -rf /var/lib/apt/lists/*"
+
+
+def test_optimize_merges_consecutive_installs():
+    commands = [
+        APT.format("git curl"),
+        "RUN pip install --no-cache-dir black",
+        APT.format("curl fish"),
+        "RUN pip install --no-cache-dir ruff black",
+        "RUN echo done",
+        APT.format("vim"),
+    ]
+
+    assert optimize(commands) == [
+        "RUN apt-get update \\\n"
+        "    && apt-get install -y git curl fish \\\n"
+        "    && rm -rf /var/lib/apt/lists/*",
+        "RUN pip install --no-cache-dir black ruff",
+        "RUN echo done",
+        "RUN apt-get update \\\n"
+        "    && apt-get install -y vim \\\n"
+        "    && rm -rf /var/lib/apt/lists/*",
+    ]
+
+
+def test_optimize_keeps_installs_that_can_not_be_merged():
+    commands = [
+        APT.format("git"),
+        "RUN apt-get install -y --no-install-recommends curl",
+        "RUN pip install -r requirements.txt",
+        "RUN pip install $PACKAGES",
+        "RUN --mount=type=cache,target=/root/.cache pip install black",
+    ]
+
+    optimized = optimize(commands)
+
+    assert optimized[2:] == commands[2:]
+    assert "--no-install-recommends" not in optimized[0]
+
+
+def test_optimize_does_not_merge_conflicting_versions():
+    commands = [
+        "RUN pip install black",
+        "RUN pip install ruff",
+        "RUN pip install black==22.1",
+        "RUN apt-get install -y git",
+        "RUN apt-get install -y curl",
+    ]
+
+    assert optimize(commands) == [
+        "RUN apt-get install -y git curl",
+        "RUN pip install black ruff",
+        "RUN pip install black==22.1",
+    ]
+
+
+def test_optimize_does_not_move_or_merge_across_stages():
+    commands = [
+        "FROM python AS build",
+        "ENV BUILD_ID=1",
+        "RUN pip install build",
+        "FROM python",
+        "RUN pip install black",
+        "RUN echo $BUILD_ID",
+    ]
+
+    assert optimize(commands) == [
+        "FROM python AS build",
+        "RUN pip install build",
+        "ENV BUILD_ID=1",
+        "FROM python",
+        "RUN pip install black",
+        "RUN echo $BUILD_ID",
+    ]
+
+
+def test_optimize_moves_unused_variables_to_end():
+    commands = [
+        "ENV BUILD_ID=1",
+        "ARG VERSION=2",
+        "ENV DEBIAN_FRONTEND=noninteractive",
+        "LABEL maintainer=developer",
+        "RUN echo $VERSION",
+        "ENV BUILD_ID=3",
+    ]
+
+    assert optimize(commands) == [
+        "ENV BUILD_ID=1",
+        "ARG VERSION=2",
+        "ENV DEBIAN_FRONTEND=noninteractive",
+        "RUN echo $VERSION",
+        "LABEL maintainer=developer",
+        "ENV BUILD_ID=3",
+    ]
+
+
+def test_diff():
+    assert diff(["RUN echo a"]) == ""
+    changes = diff([APT.format("a"), APT.format("b")])
+    assert changes.startswith("--- devcontainer.Dockerfile\n")
+    assert "+    && apt-get install -y a b \\\n" in changes
@@ -0,0 +1,65 @@
+import pytest
+
+from devcontainer_manager.alias import AliasConfig
+from devcontainer_manager.config import Config
+from devcontainer_manager.exceptions import BaseConfigCycleException
+from devcontainer_manager.graph import ConfigGraph
+
+
+@pytest.fixture(scope="function")
+def graph(tmp_path):
+    return ConfigGraph(Config, AliasConfig(config_path=tmp_path / "aliases.yaml"))
+
+
+def write_config(path, base_config=(), extensions=()):
+    config = Config(base_config=list(base_config))
+    config.devcontainer.extensions = list(extensions)
+    config.write_yaml(path)
+    return path
+
+
+def test_graph_parses_shared_bases_once(graph, tmp_path):
+    write_config(tmp_path / "default.yaml", extensions=["default"])
+    write_config(tmp_path / "a.yaml", ["default.yaml"], ["a"])
+    write_config(tmp_path / "b.yaml", ["default.yaml"], ["b"])
+    project = write_config(tmp_path / "project.yaml", ["a.yaml", "b.yaml"], ["project"])
+
+    merged = graph.merged(project)
+
+    assert merged.devcontainer.extensions == ["default", "a", "b", "project"]
+    assert set(graph.nodes) == {
+        (tmp_path / name).resolve()
+        for name in ["default.yaml", "a.yaml", "b.yaml", "project.yaml"]
+    }
+    assert sorted((a.stem, b.stem) for a, b in graph.edges) == [
+        ("a", "default"),
+        ("b", "default"),
+        ("project", "a"),
+        ("project", "b"),
+    ]
+    assert graph.merged(tmp_path / "a.yaml") is graph.merged(tmp_path / "a.yaml")
+
+
+def test_graph_detects_cycles(graph, tmp_path):
+    write_config(tmp_path / "a.yaml", ["b.yaml"])
+    write_config(tmp_path / "b.yaml", ["c.yaml"])
+    write_config(tmp_path / "c.yaml", ["a.yaml"])
+
+    with pytest.raises(BaseConfigCycleException) as e:
+        graph.merged(tmp_path / "a.yaml")
+
+    assert [p.split("/")[-1] for p in e.value.chain] == ["a.yaml", "b.yaml", "c.yaml", "a.yaml"]
+
+
+def test_graph_invalidates_changed_configs_and_dependents(graph, tmp_path):
+    write_config(tmp_path / "default.yaml", extensions=["default"])
+    write_config(tmp_path / "a.yaml", ["default.yaml"], ["a"])
+    write_config(tmp_path / "b.yaml", extensions=["b"])
+    project = write_config(tmp_path / "project.yaml", ["a.yaml", "b.yaml"], ["project"])
+    graph.merged(project)
+
+    write_config(tmp_path / "default.yaml", extensions=["changed"])
+    invalid = graph.invalidate([tmp_path / "default.yaml"])
+
+    assert {p.stem for p in invalid} == {"default", "a", "project"}
+    assert graph.merged(project).devcontainer.extensions == ["changed", "a", "b", "project"]
@@ -0,0 +1,41 @@
+import pytest
+
+from devcontainer_manager.exceptions import InvalidArgumentException
+from devcontainer_manager.layered import DEFAULT_SOURCE, ConfigLayer, LayeredConfig
+
+
+@pytest.fixture(scope="function")
+def layered():
+    return LayeredConfig(
+        [
+            ConfigLayer("defaults.yaml", {"devcontainer": {"extensions": ["a"], "name": "x"}}),
+            ConfigLayer("base.yaml", {"devcontainer": {"extensions": ["b"]}}),
+            ConfigLayer("project.yaml", {"devcontainer": {"name": "project"}}),
+        ]
+    )
+
+
+def test_layered_config_records_sources(layered):
+    value, sources = layered.get("devcontainer.extensions")
+    assert value == ["a", "b"]
+    assert [source for source, _ in sources] == ["defaults.yaml", "base.yaml"]
+
+    value, sources = layered.get("devcontainer.name")
+    assert value == "project"
+    assert sources == [("project.yaml", "project")]
+
+    value, sources = layered.get("devcontainer.image")
+    assert value == "{{ devcontainer.name }}-dev"
+    assert sources == [(DEFAULT_SOURCE, value)]
+
+
+def test_layered_config_matches_merged_config(layered):
+    assert layered.config.devcontainer.extensions == layered.get("devcontainer.extensions").value
+    assert layered.resolved("devcontainer.image") == "project-dev"
+
+
+def test_layered_config_rejects_unknown_fields(layered):
+    with pytest.raises(InvalidArgumentException):
+        layered.get("devcontainer.unknown")
+    with pytest.raises(InvalidArgumentException):
+        layered.get("devcontainer.name.x")
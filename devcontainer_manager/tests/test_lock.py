@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from devcontainer_manager.context import get_context
+from devcontainer_manager.exceptions import LockDriftException
+from devcontainer_manager.generator import Generator
+from devcontainer_manager.lock import Lock
+from devcontainer_manager.settings import Settings
+from devcontainer_manager.util import working_directory
+
+
+@pytest.fixture(scope="function")
+def project(tmp_path):
+    settings = Settings(global_config_dir=tmp_path / "global", snapshot_max_entries=0)
+    context = get_context(settings, create_if_not_exist=True)
+    base = tmp_path / "base.yaml"
+    base.write_text("devcontainer:\n    name: base\n    extensions: [a]\n")
+    project_dir = tmp_path / "project"
+    (project_dir / ".devcontainer").mkdir(parents=True)
+    (project_dir / ".devcontainer" / "overrides.yaml").write_text(
+        f"base_config: [{base.as_posix()}]\ndevcontainer:\n    extensions: [b]\n"
+    )
+    with working_directory(project_dir):
+        yield context, base
+
+
+def generator(context, **kwargs):
+    return Generator(context, use_cache=False, **kwargs)
+
+
+def test_generate_uses_valid_lock(project, monkeypatch):
+    context, base = project
+    result = generator(context).generate()
+    lock_path = generator(context).lock_path
+    assert lock_path in result.changed
+
+    lock = Lock.load(lock_path, lock_path.parent.parent)
+    assert base in lock.inputs
+    assert lock.config().devcontainer.extensions == ["a", "b"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("base chain loaded again")
+
+    monkeypatch.setattr(Generator, "layered", fail)
+    assert generator(context, frozen=True).generate().up_to_date
+    # touching the inputs does not invalidate the lock, only their stats are updated
+    base.touch()
+    assert generator(context).generate().changed == [lock_path]
+
+    monkeypatch.undo()
+    base.write_text("devcontainer:\n    name: changed\n")
+    with pytest.raises(LockDriftException) as e:
+        generator(context, frozen=True).generate()
+    assert e.value.changed == [base]
+
+    generator(context).generate()
+    assert Lock.load(lock_path, lock_path.parent.parent).config().devcontainer.name == "changed"
+
+
+def test_frozen_generate_requires_lock(project):
+    context, _ = project
+
+    with pytest.raises(LockDriftException, match="does not exist"):
+        generator(context, frozen=True).generate()
+
+
+def test_lock_stores_project_inputs_relative_to_project(project, tmp_path):
+    context, base = project
+    generator(context).generate()
+
+    # checkout of the project at another path
+    checkout = tmp_path / "checkout"
+    (tmp_path / "project").rename(checkout)
+    with working_directory(checkout):
+        lock_path = generator(context).lock_path
+        assert ".devcontainer/overrides.yaml" in json.loads(lock_path.read_text())["inputs"]
+        assert generator(context, frozen=True).generate().up_to_date
@@ -0,0 +1,87 @@
+from devcontainer_manager.config import Config
+from devcontainer_manager.merge import merge_configs, merge_layers
+from devcontainer_manager.types import MountString
+
+
+def test_merge_layers_shares_unchanged_values():
+    shared = {"extensions": ["a"], "name": "base"}
+    base = {"devcontainer": shared, "docker": {"image": "base"}}
+    override = {"docker": {"image": "override"}, "base_config": None}
+
+    merged = merge_layers([base, override])
+
+    assert merged == {"devcontainer": shared, "docker": {"image": "override"}}
+    assert merged["devcontainer"] is shared
+    assert base == {"devcontainer": shared, "docker": {"image": "base"}}
+
+
+def test_merge_layers_concatenates_lists_once():
+    layers = [{"run_args": [str(i)]} for i in range(5)]
+
+    assert merge_layers(layers) == {"run_args": ["0", "1", "2", "3", "4"]}
+    assert merge_layers(layers[:1])["run_args"] is layers[0]["run_args"]
+
+
+def test_merge_configs_matches_pairwise_merge():
+    configs = []
+    for i in range(4):
+        config = Config()
+        config.devcontainer.extensions = [f"ext-{i}"]
+        config.devcontainer.image = f"image-{i}"
+        configs.append(config)
+
+    merged = merge_configs(configs)
+
+    assert merged == configs[0] | configs[1] | configs[2] | configs[3]
+    assert merged.devcontainer.extensions == ["ext-0", "ext-1", "ext-2", "ext-3"]
+    assert merged.devcontainer.image == "image-3"
+
+
+def test_merge_layers_merges_mounts_by_destination():
+    layers = [
+        {"devcontainer": {"mounts": [MountString("/a:/mnt/a"), MountString("/b:/mnt/b")]}},
+        {"devcontainer": {"mounts": [MountString("/c:/mnt/c"), MountString("/b2:/mnt/b")]}},
+    ]
+
+    mounts = merge_layers(layers)["devcontainer"]["mounts"]
+
+    assert mounts == ["/a:/mnt/a", "/b2:/mnt/b", "/c:/mnt/c"]
+    assert mounts[1] is layers[1]["devcontainer"]["mounts"][1]
+
+
+def test_merge_layers_deduplicates_extensions_and_run_args():
+    layers = [
+        {"devcontainer": {"extensions": ["a", "b"], "run_args": ["--env", "A=1", "--gpus=all"]}},
+        {"devcontainer": {"extensions": ["b", "c"], "run_args": ["--env", "B=1", "--gpus=all"]}},
+    ]
+
+    merged = merge_layers(layers)["devcontainer"]
+
+    assert merged["extensions"] == ["a", "b", "c"]
+    assert merged["run_args"] == ["--env", "A=1", "--gpus=all", "--env", "B=1"]
+
+
+def test_merge_configs_with_replace_and_remove_tags(tmp_path):
+    (tmp_path / "base.yaml").write_text(
+        "devcontainer:\n"
+        "  extensions: [a, b, c]\n"
+        "  mounts: ['/a:/mnt/a', '/b:/mnt/b']\n"
+        "docker:\n"
+        "  additional_commands: [RUN a]\n"
+    )
+    (tmp_path / "project.yaml").write_text(
+        "devcontainer:\n"
+        "  extensions: !remove [b]\n"
+        "  mounts: !remove ['/other:/mnt/a']\n"
+        "docker:\n"
+        "  additional_commands: !replace []\n"
+    )
+    base = Config.parse_file(tmp_path / "base.yaml")
+    project = Config.parse_file(tmp_path / "project.yaml")
+
+    merged = merge_configs([base, project])
+
+    assert merged.devcontainer.extensions == ["a", "c"]
+    assert merged.devcontainer.mounts == ["/b:/mnt/b"]
+    assert merged.docker.additional_commands == []
+    assert project.devcontainer.extensions == []
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from devcontainer_manager.config import ResolvedConfig
+from devcontainer_manager.exceptions import InvalidArgumentException
+from devcontainer_manager.renderer import (
+    BUILD_SCRIPT,
+    DEVCONTAINER_JSON,
+    DOCKERFILE,
+    devcontainer_json,
+    render,
+)
+
+
+@pytest.fixture(scope="function")
+def config():
+    return ResolvedConfig(
+        devcontainer=dict(
+            name="project",
+            image="project-dev",
+            container_name="project",
+            container_hostname="project",
+            workspace_mount="src=/src,dst=/mnt/workspace,type=bind,consistency=cached",
+            run_args=["--gpus=all"],
+            extensions=["ms-python.python"],
+            additional_options=['"appPort": "8080"', '"shutdownAction": "stopContainer"'],
+        )
+    )
+
+
+def test_render_devcontainer_json(config):
+    outputs = render(config)
+
+    assert list(outputs) == [DEVCONTAINER_JSON]
+    assert json.loads(outputs[DEVCONTAINER_JSON]) == {
+        "name": "project",
+        "workspaceMount": "src=/src,dst=/mnt/workspace,type=bind,consistency=cached",
+        "workspaceFolder": "/mnt/workspace",
+        "image": "project-dev",
+        "userEnvProbe": "loginInteractiveShell",
+        "runArgs": ["--name", "project", "--hostname", "project", "--gpus=all"],
+        "customizations": {"vscode": {"extensions": ["ms-python.python"]}},
+        "shutdownAction": "stopContainer",
+        "appPort": "8080",
+    }
+
+
+def test_render_dockerfile_only_if_docker_file_is_set(config, tmp_path):
+    dockerfile = tmp_path / "Dockerfile"
+    dockerfile.write_text("FROM ubuntu\n")
+    config = ResolvedConfig.parse_obj(
+        {
+            **config.dict(),
+            "docker": {"file": dockerfile, "additional_commands": ["RUN true"]},
+        }
+    )
+
+    outputs = render(config)
+
+    assert list(outputs) == [DEVCONTAINER_JSON, DOCKERFILE, BUILD_SCRIPT]
+    assert b"".join(outputs[DOCKERFILE].chunks()) == b"FROM ubuntu\n\n\nRUN true\n"
+    assert "-t project-dev ." in outputs[BUILD_SCRIPT]
+
+
+def test_render_invalid_additional_option(config):
+    config.devcontainer.additional_options = ['"appPort": 8080,']
+
+    with pytest.raises(InvalidArgumentException):
+        devcontainer_json(config)
+
+
+def test_render_dockerfile_with_includes_without_templating(config, tmp_path):
+    (tmp_path / "Dockerfile").write_text("FROM ubuntu\nLABEL x={{ .Values.x }}")
+    (tmp_path / "tools.Dockerfile").write_text("RUN apt-get install -y git\n")
+    config = ResolvedConfig.parse_obj(
+        {
+            **config.dict(),
+            "docker": {
+                "file": tmp_path / "Dockerfile",
+                "include": [tmp_path / "tools.Dockerfile"],
+                "additional_commands": ["RUN true"],
+            },
+        }
+    )
+
+    dockerfile = render(config)[DOCKERFILE]
+
+    assert dockerfile.sources == [tmp_path / "Dockerfile", tmp_path / "tools.Dockerfile"]
+    assert b"".join(dockerfile.chunks()) == (
+        b"FROM ubuntu\nLABEL x={{ .Values.x }}\nRUN apt-get install -y git\n\n\nRUN true\n"
+    )
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import pytest
+
+from devcontainer_manager.exceptions import TemplateReferenceCycleException
+from devcontainer_manager.resolver import find_references, render_template_values
+
+
+def test_find_references_follows_attribute_chains():
+    references = find_references("{{ devcontainer.name }}-{{ login }}-{{ a['b'].c }}")
+
+    assert references == {("devcontainer", "name"), ("login",), ("a", "b", "c")}
+
+
+def test_render_template_values_resolves_chained_references():
+    values = {
+        "devcontainer": {
+            "name": "{{ project_root_basename }}",
+            "image": "{{ devcontainer.name }}-dev",
+            "container_name": "{{ devcontainer.image }}",
+            "mounts": ["/src:{{ devcontainer.workspace_folder }}"],
+            "workspace_folder": Path("/mnt/{{ devcontainer.name }}"),
+        }
+    }
+
+    resolved = render_template_values(values, {"project_root_basename": "project"})
+
+    assert resolved["devcontainer"] == {
+        "name": "project",
+        "image": "project-dev",
+        "container_name": "project-dev",
+        "mounts": ["/src:/mnt/project"],
+        "workspace_folder": "/mnt/project",
+    }
+    assert values["devcontainer"]["name"] == "{{ project_root_basename }}"
+
+
+def test_render_template_values_keeps_values_without_templates():
+    path = Path("/tmp")
+    resolved = render_template_values({"path": path, "items": [1, None]})
+
+    assert resolved == {"path": path, "items": [1, None]}
+    assert resolved["path"] is path
+
+
+def test_render_template_values_reports_cycle():
+    values = {"a": {"x": "{{ a.y }}", "y": "{{ b }}"}, "b": "{{ a.x }}"}
+
+    with pytest.raises(TemplateReferenceCycleException) as e:
+        render_template_values(values)
+
+    assert e.value.chain == ["a.x", "a.y", "b", "a.x"]
@@ -0,0 +1,79 @@
+"""Startup time benchmarks of the command line interface.
+
+Every command is run in a fresh interpreter with `python -X importtime` and the total import
+time is compared to a budget. Budgets can be scaled for slow machines by setting
+`DEVCONTAINER_MANAGER_STARTUP_BUDGET_SCALE`.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from devcontainer_manager.completion import write_index
+
+HEAVY_MODULES = {"pydantic", "pydantic_yaml", "ruamel", "jinja2", "cookiecutter"}
+BUDGET_SCALE = float(os.environ.get("DEVCONTAINER_MANAGER_STARTUP_BUDGET_SCALE", "1"))
+PROJECT_DIR = Path(__file__).parent.parent.parent
+
+RUN_APP = "from devcontainer_manager.cli.cli import app; app(prog_name='devcontainer_manager')"
+
+
+def import_times(args, env):
+    """Returns cumulative import time in seconds for every top level module imported by
+    running the command line interface with `args`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUN_APP, *args],
+        env={**os.environ, "PYTHONPATH": PROJECT_DIR.as_posix(), **env},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+@pytest.fixture(scope="module")
+def global_config_dir(tmp_path_factory):
+    global_config_dir = tmp_path_factory.mktemp("global")
+    (global_config_dir / "config.yaml").write_text("template_dir: templates\n")
+    alias_path = global_config_dir / "aliases.yaml"
+    alias_path.write_text("aliases:\n    python: python.yaml\n")
+    write_index(alias_path, {"python": Path("python.yaml")})
+    return global_config_dir
+
+
+@pytest.mark.parametrize(
+    ["args", "env", "budget", "allowed_modules"],
+    [
+        (["--version"], {}, 0.5, set()),
+        (["alias", "list"], {}, 1.0, HEAVY_MODULES),
+        (
+            [],
+            {
+                "_DEVCONTAINER_MANAGER_COMPLETE": "complete_bash",
+                "COMP_WORDS": "devcontainer_manager generate ",
+                "COMP_CWORD": "2",
+            },
+            0.5,
+            set(),
+        ),
+    ],
+    ids=["version", "alias-list", "completion"],
+)
+def test_startup_time(global_config_dir, args, env, budget, allowed_modules):
+    env = {"DEVCONTAINER_MANAGER_GLOBAL_CONFIG_DIR": global_config_dir.as_posix(), **env}
+
+    times = import_times(args, env)
+
+    imported_heavy_modules = {m.split(".")[0] for m in times} & HEAVY_MODULES
+    assert imported_heavy_modules <= allowed_modules
+    assert sum(times.values()) < budget * BUDGET_SCALE
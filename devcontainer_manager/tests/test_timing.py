@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from devcontainer_manager import timing
+
+
+@pytest.fixture(scope="function", autouse=True)
+def enabled_timing(monkeypatch):
+    monkeypatch.setattr(timing, "_enabled", True)
+    monkeypatch.setattr(timing, "_spans", [])
+
+
+def test_spans_are_aggregated_by_name():
+    with timing.span("generate"):
+        for _ in range(3):
+            with timing.span("config.parse"):
+                pass
+        with timing.span("render"):
+            pass
+
+    totals = timing.totals()
+    assert [(t.name, t.depth, t.count) for t in totals] == [
+        ("generate", 0, 1),
+        ("config.parse", 1, 3),
+        ("render", 1, 1),
+    ]
+
+    lines = [json.loads(line) for line in timing.format_json_lines().splitlines()]
+    assert [line["span"] for line in lines] == ["generate", "config.parse", "render"]
+    assert "config.parse" in timing.format_table()
+
+
+def test_captured_spans_are_not_recorded_globally():
+    with timing.capture() as captured:
+        with timing.span("generate"):
+            pass
+
+    assert timing.spans() == []
+    timing.record(captured)
+    assert [s.name for s in timing.spans()] == ["generate"]
+
+
+def test_spans_are_not_recorded_when_disabled(monkeypatch):
+    monkeypatch.setattr(timing, "_enabled", False)
+    with timing.span("generate"):
+        pass
+    assert timing.spans() == []
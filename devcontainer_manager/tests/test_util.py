@@ -0,0 +1,38 @@
+import os
+
+from devcontainer_manager.util import write_if_changed
+
+
+def test_write_if_changed_skips_unchanged_file(tmp_path):
+    path = tmp_path / "devcontainer.json"
+    path.write_text("{}\n")
+    os.utime(path, ns=(0, 0))
+
+    assert not write_if_changed(path, "{}\n")
+    assert path.stat().st_mtime_ns == 0
+
+
+def test_write_if_changed_replaces_file_and_keeps_mode(tmp_path):
+    path = tmp_path / "build.sh"
+    path.write_text("old")
+    path.chmod(0o755)
+
+    assert write_if_changed(path, "new")
+    assert write_if_changed(tmp_path / "new.sh", "new")
+    assert path.read_text() == "new"
+    assert path.stat().st_mode & 0o777 == 0o755
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["build.sh", "new.sh"]
+
+
+def test_write_if_changed_compares_chunks(tmp_path):
+    path = tmp_path / "devcontainer.Dockerfile"
+    path.write_bytes(b"FROM ubuntu\nRUN true\n")
+    os.utime(path, ns=(0, 0))
+
+    assert not write_if_changed(path, iter([b"FROM ubuntu\n", b"RUN true\n"]))
+    assert path.stat().st_mtime_ns == 0
+    assert write_if_changed(path, iter([b"FROM ubuntu\n"]))
+    assert path.read_bytes() == b"FROM ubuntu\n"
+    assert write_if_changed(path, iter([b"FROM ubuntu\n", b"RUN false\n"]))
+    assert path.read_bytes() == b"FROM ubuntu\nRUN false\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["devcontainer.Dockerfile"]
@@ -0,0 +1,45 @@
+import pytest
+
+from devcontainer_manager import variables
+from devcontainer_manager.resolver import render_template_values
+from devcontainer_manager.util import find_repository_root
+from devcontainer_manager.variables import GlobalVariables, register_variable
+
+
+@pytest.fixture(scope="function")
+def calls(monkeypatch):
+    monkeypatch.setattr(variables, "_registry", dict(variables._registry))
+    monkeypatch.setattr(variables, "_values", {})
+    calls = []
+
+    @register_variable("cpu_count", "number of cpus")
+    def cpu_count(project_path):
+        calls.append(project_path)
+        return 8
+
+    return calls
+
+
+def test_variables_are_computed_only_when_referenced(calls, tmp_path):
+    global_variables = GlobalVariables(tmp_path)
+
+    assert render_template_values({"name": "x"}, global_variables) == {"name": "x"}
+    assert calls == []
+
+    values = {"cpus": "{{ cpu_count }}", "args": ["--cpus={{ cpu_count }}"]}
+    assert render_template_values(values, global_variables) == {
+        "cpus": "8",
+        "args": ["--cpus=8"],
+    }
+    assert render_template_values(values, GlobalVariables(tmp_path))["cpus"] == "8"
+    assert calls == [tmp_path.resolve()]
+    assert global_variables.used_values() == {"cpu_count": 8}
+    assert "{{ cpu_count }}: number of cpus" in global_variables.to_readme_string()
+
+
+def test_find_repository_root(tmp_path):
+    (tmp_path / "repo" / ".git").mkdir(parents=True)
+    (tmp_path / "repo" / "src" / "pkg").mkdir(parents=True)
+
+    assert find_repository_root(tmp_path / "repo" / "src" / "pkg") == tmp_path / "repo"
+    assert find_repository_root(tmp_path / "repo") == tmp_path / "repo"
@@ -0,0 +1,143 @@
+import json
+import sys
+
+import pytest
+
+from devcontainer_manager.generator import Generator
+from devcontainer_manager.renderer import DEVCONTAINER_JSON, DOCKERFILE
+from devcontainer_manager.settings import Settings
+from devcontainer_manager.util import file_stat, working_directory
+from devcontainer_manager.watch import InotifyWatcher, PollingWatcher, WatchSession
+
+
+@pytest.fixture(
+    scope="function",
+    params=[
+        PollingWatcher,
+        pytest.param(
+            InotifyWatcher,
+            marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="linux only"),
+        ),
+    ],
+)
+def watcher(request):
+    watcher = request.param()
+    yield watcher
+    watcher.close()
+
+
+def test_watcher_reports_changed_files(watcher, tmp_path):
+    watched = tmp_path / "config.yaml"
+    other = tmp_path / "other.yaml"
+    watched.write_text("a")
+    other.write_text("a")
+    watcher.watch([watched])
+
+    assert watcher.changes(timeout=0.1) == set()
+    other.write_text("b")
+    assert watcher.changes(timeout=0.1) == set()
+
+    # editors often replace the file instead of writing to it
+    replacement = tmp_path / "config.yaml.tmp"
+    replacement.write_text("bb")
+    replacement.replace(watched)
+    assert watcher.changes(timeout=1) == {watched}
+
+
+def test_watcher_reports_changes_since_given_stats(watcher, tmp_path):
+    watched = tmp_path / "config.yaml"
+    watched.write_text("a")
+    stats = {watched: file_stat(watched)}
+    # saved after its stat was taken, but before it is watched
+    watched.write_text("bb")
+    watcher.watch([watched], stats)
+
+    assert watcher.changes(timeout=1) == {watched}
+    assert watcher.changes(timeout=0.1) == set()
+
+
+class BoundedWatcher(PollingWatcher):
+    """Waits at most a second for changes, so that missed changes fail instead of blocking."""
+
+    def changes(self, timeout=None):
+        return super().changes(1.0 if timeout is None else timeout)
+
+
+@pytest.fixture(scope="function")
+def project(tmp_path):
+    settings = Settings(global_config_dir=tmp_path / "global", snapshot_max_entries=0)
+    base = tmp_path / "base.yaml"
+    base.write_text("devcontainer:\n    name: base\n")
+    project_dir = tmp_path / "project"
+    (project_dir / ".devcontainer").mkdir(parents=True)
+    (project_dir / ".devcontainer" / "overrides.yaml").write_text(
+        f"base_config: [{base.as_posix()}]\ndocker:\n    file: ../Dockerfile.base\n"
+    )
+    (project_dir / "Dockerfile.base").write_text("FROM base\n")
+    with working_directory(project_dir):
+        yield settings, base
+
+
+def _name() -> str:
+    return json.loads(DEVCONTAINER_JSON.read_text())["name"]
+
+
+def test_session_regenerates_dependents_of_changed_base_config(project):
+    settings, base = project
+    session = WatchSession(settings=settings)
+    session.update()
+    assert _name() == "base"
+
+    base.write_text("devcontainer:\n    name: changed\n")
+    session.update([base])
+
+    assert _name() == "changed"
+
+
+def test_session_renders_changed_dockerfile_without_resolving(project, monkeypatch):
+    settings, _ = project
+    session = WatchSession(settings=settings)
+    session.update()
+    dockerfile = session.resolved_config.docker.file
+
+    def fail(*args, **kwargs):
+        raise AssertionError("config resolved again")
+
+    monkeypatch.setattr(Generator, "layered", fail)
+    monkeypatch.setattr(Generator, "resolve", fail)
+    dockerfile.write_text("FROM changed\n")
+    session.update([dockerfile])
+
+    assert DOCKERFILE.read_text().startswith("FROM changed\n")
+
+
+def test_session_reloads_context_when_aliases_change(project, tmp_path):
+    settings, _ = project
+    for name in ["one", "other"]:
+        (tmp_path / f"{name}.yaml").write_text(f"devcontainer:\n    name: {name}\n")
+    aliases = settings.global_config_dir / "aliases.yaml"
+    aliases.parent.mkdir(parents=True)
+    aliases.write_text(f"aliases:\n    template: {(tmp_path / 'one.yaml').as_posix()}\n")
+    session = WatchSession(["template"], settings=settings)
+    context = session.context
+    session.update()
+    assert _name() == "one"
+
+    aliases.write_text(f"aliases:\n    template: {(tmp_path / 'other.yaml').as_posix()}\n")
+    session.update([aliases])
+
+    assert session.context is not context
+    assert _name() == "other"
+
+
+def test_session_run_reports_inputs_saved_while_event_is_handled(project):
+    settings, base = project
+    events = WatchSession(settings=settings).run(BoundedWatcher())
+    assert next(events).error is None
+
+    base.write_text("devcontainer:\n    name: changed\n")
+    event = next(events)
+
+    assert event.error is None
+    assert event.changed == [base]
+    assert _name() == "changed"
@@ -0,0 +1,55 @@
+import pytest
+
+from devcontainer_manager.alias import AliasConfig
+from devcontainer_manager.config import Config
+from devcontainer_manager.exceptions import InvalidArgumentException
+from devcontainer_manager.global_config import GlobalConfig
+from devcontainer_manager.yaml import YAML_BACKENDS, load_str, set_backend
+
+TEMPLATE = """
+base_config:
+  - python
+  - ./base.yaml
+devcontainer:
+    name: &name 'x-{{ project_root_basename }}'
+    container_name: *name
+    workspace_folder:
+    mounts:
+      - /home/user:/mnt/home
+      - src=/data,dst=/mnt/data,type=bind
+    run_args: ["--gpus=all", "--shm-size=8g"]
+    additional_options:
+      - >
+        "appPort": "8080"
+      - '"forwardPorts": [8000, 8001]'
+docker:
+    file: ../Dockerfile
+    additional_commands:
+      - |
+        RUN apt-get update \\
+            && apt-get install -y git
+      - ENV UID=1000 FLAG=yes ON=true
+"""
+
+
+@pytest.mark.parametrize(
+    "config_type,content",
+    [
+        (Config, TEMPLATE),
+        (Config, Config().yaml(with_descriptions=True)),
+        (Config, Config.none().yaml()),
+        (GlobalConfig, GlobalConfig().yaml(with_descriptions=True)),
+        (AliasConfig, "aliases:\n    python: /templates/python.yaml\n"),
+    ],
+)
+def test_yaml_backends_parse_identical_configs(config_type, content):
+    data = {backend: load_str(content, backend) for backend in YAML_BACKENDS}
+    configs = {backend: config_type.parse_obj(data[backend]) for backend in YAML_BACKENDS}
+
+    assert data["c"] == data["pure"]
+    assert configs["c"] == configs["pure"]
+
+
+def test_yaml_backend_is_validated():
+    with pytest.raises(InvalidArgumentException):
+        set_backend("libyaml")
@@ -0,0 +1,126 @@
+"""Lightweight timing of generate phases.
+
+Phases are wrapped in named spans, e.g. `with span("config.parse"): ...`. Spans are recorded
+only after `enable()` was called, otherwise `span` is a no-op. Span names are stable, so timings
+can be aggregated across runs and machines. This module must import only the standard library.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+
+class Span(NamedTuple):
+    name: str
+    depth: int
+    start: float
+    duration: float
+
+
+class SpanTotal(NamedTuple):
+    name: str
+    depth: int
+    count: int
+    duration: float
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        _stack.append(self.name)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        _stack.pop()
+        _spans.append(Span(self.name, len(_stack), self.start, duration))
+
+
+class _NoSpan:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_enabled = False
+_spans: List[Span] = []
+_stack: List[str] = []
+_no_span = _NoSpan()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str):
+    """Returns context manager timing phase `name` if timings are enabled."""
+    return _Span(name) if _enabled else _no_span
+
+
+def spans() -> List[Span]:
+    return list(_spans)
+
+
+def record(recorded: List[Span]):
+    """Adds spans recorded elsewhere, i.e. in worker process."""
+    _spans.extend(Span(*s) for s in recorded)
+
+
+@contextmanager
+def capture() -> Iterator[List[Span]]:
+    """Collects spans recorded in the block into the yielded list instead of global spans."""
+    global _spans
+    captured: List[Span] = []
+    previous, _spans = _spans, captured
+    try:
+        yield captured
+    finally:
+        _spans = previous
+
+
+def totals(recorded: Optional[List[Span]] = None) -> List[SpanTotal]:
+    """Returns total duration and count of spans per name, in order of their first start."""
+    recorded = _spans if recorded is None else recorded
+    result: Dict[str, SpanTotal] = {}
+    for s in sorted(recorded, key=lambda s: s.start):
+        total = result.get(s.name, SpanTotal(s.name, s.depth, 0, 0.0))
+        result[s.name] = total._replace(
+            count=total.count + 1, duration=total.duration + s.duration
+        )
+    return list(result.values())
+
+
+def format_table(recorded: Optional[List[Span]] = None) -> str:
+    lines = [f"{'phase':<40} {'count':>6} {'total':>11}"]
+    for total in totals(recorded):
+        name = "  " * total.depth + total.name
+        lines.append(f"{name:<40} {total.count:>6} {total.duration * 1000:>9.2f}ms")
+    return "\n".join(lines)
+
+
+def format_json_lines(recorded: Optional[List[Span]] = None) -> str:
+    pid = os.getpid()
+    return "\n".join(
+        json.dumps(
+            {
+                "span": total.name,
+                "depth": total.depth,
+                "count": total.count,
+                "total_ms": round(total.duration * 1000, 3),
+                "pid": pid,
+            }
+        )
+        for total in totals(recorded)
+    )
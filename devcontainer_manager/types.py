@@ -61,6 +61,8 @@ class MountString(str):
     def to_devcontainer_format(self):
         return MountString(
             f"src={self.src}," f"dst={self.dst}," "type=bind,consistency=cached",
+            src=self.src,
+            dst=self.dst,
         )
 
     def __repr__(self) -> str:
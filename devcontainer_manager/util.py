@@ -1,44 +1,114 @@
-import copy
-import subprocess
+import contextlib
+import os
+import tempfile
 from pathlib import Path
+from typing import BinaryIO, Iterable, Optional, Tuple, Union
 
-import jinja2
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
+FileStat = Optional[Tuple[int, int, int]]
 
-def render_recursive_template(template: str, values: dict):
-    prev = template
-    while True:
-        rendered = jinja2.Template(prev, undefined=jinja2.StrictUndefined).render(values)
-        if rendered == prev:
-            return rendered
-        prev = rendered
 
+def find_repository_root(path: Path) -> Optional[Path]:
+    """Returns closest parent of `path` (or `path` itself) containing `.git`, same as
+    `git rev-parse --show-toplevel` without running git."""
+    path = Path(path).resolve()
+    for directory in [path, *path.parents]:
+        if (directory / ".git").exists():
+            return directory
+    return None
 
-def get_project_root_basename() -> str:
+
+def get_project_root_basename(path: Optional[Path] = None) -> Optional[str]:
+    root = find_repository_root(path or Path.cwd())
+    return root.name.lower() if root is not None else None
+
+
+@contextlib.contextmanager
+def working_directory(path: Path):
+    cwd = Path.cwd()
+    os.chdir(path)
     try:
-        git_folder_path = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            check=True,
-            stdout=subprocess.PIPE,
-            universal_newlines=True,
-        ).stdout
-        return Path(git_folder_path).name.strip().lower()
-    except subprocess.CalledProcessError:
-        return None
+        yield
+    finally:
+        os.chdir(cwd)
+
 
+def write_if_changed(path: Path, content: Union[str, Iterable[bytes]]) -> bool:
+    """Atomically replaces `path` with `content` unless it already has exactly this content.
 
-def dict_merge(d, overwrite):
-    new_config = copy.deepcopy(d)
+    `content` can also be an iterable of byte chunks, which is written to a temporary file and
+    compared with the existing file chunk by chunk, so it is never held in memory as a whole.
+    Unchanged files are not touched at all, so their mtime is preserved. Returns whether the file
+    was written.
+    """
+    if isinstance(content, str):
+        data = content.encode()
+        try:
+            if path.read_bytes() == data:
+                return False
+        except FileNotFoundError:
+            pass
+        content = [data]
+
+    try:
+        existing = open(path, "rb")
+        mode = os.fstat(existing.fileno()).st_mode & 0o777
+    except FileNotFoundError:
+        existing = None
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            unchanged = _write_chunks(f, content, existing)
+        if unchanged:
+            os.unlink(tmp_path)
+            return False
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    finally:
+        if existing is not None:
+            existing.close()
+    return True
 
-    for k, v in overwrite.items():
-        if isinstance(v, dict):
-            orig_dict = d[k] if k in d and d[k] else dict()
-            new_config[k] = dict_merge(orig_dict, v)
-        elif isinstance(v, list):
-            orig_list = d[k] if k in d and d[k] else list()
-            new_config[k] = orig_list + v
-        else:
-            if v is not None:
-                new_config[k] = v
 
-    return new_config
+def _write_chunks(f: BinaryIO, chunks: Iterable[bytes], existing: Optional[BinaryIO]) -> bool:
+    """Writes `chunks` to `f`, returns whether they are the same as content of `existing`."""
+    unchanged = existing is not None
+    for chunk in chunks:
+        f.write(chunk)
+        if unchanged and existing.read(len(chunk)) != chunk:
+            unchanged = False
+    return unchanged and existing.read(1) == b""
+
+
+@contextlib.contextmanager
+def directory_lock(path: Path):
+    """Holds exclusive lock of directory `path`."""
+    if fcntl is None:
+        yield
+        return
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def file_stat(path: Path) -> FileStat:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
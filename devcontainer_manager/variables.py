@@ -0,0 +1,127 @@
+"""Pre-defined variables available to all config templates.
+
+Variables are computed lazily - only when a template references them - and memoized per
+process and project path. Additional variables can be registered with `register_variable` or
+by packages through `devcontainer_manager.variables` entry points, which point to a function
+taking the project path and returning the value (its docstring is used as description).
+"""
+import getpass
+import os
+import platform
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Mapping, NamedTuple, Optional, Set, Tuple
+
+from .timing import span
+from .util import get_project_root_basename
+
+ENTRY_POINT_GROUP = "devcontainer_manager.variables"
+
+VariableFactory = Callable[[Path], Any]
+
+
+class Variable(NamedTuple):
+    name: str
+    factory: VariableFactory
+    description: str
+
+
+_registry: Dict[str, Variable] = {}
+_entry_points_loaded = False
+_values: Dict[Tuple[str, Path], Any] = {}
+
+
+def register_variable(name: str, description: str = ""):
+    """Registers decorated function as factory of variable `name`, the function is called with
+    project path when the variable is first used."""
+
+    def decorator(factory: VariableFactory) -> VariableFactory:
+        _registry[name] = Variable(name, factory, description or (factory.__doc__ or "").strip())
+        return factory
+
+    return decorator
+
+
+def registered_variables() -> Dict[str, Variable]:
+    global _entry_points_loaded
+    if not _entry_points_loaded:
+        _entry_points_loaded = True
+        for entry_point in _entry_points():
+            register_variable(entry_point.name)(entry_point.load())
+    return _registry
+
+
+def _entry_points():
+    if sys.version_info < (3, 8):
+        return []
+    from importlib.metadata import entry_points
+
+    if sys.version_info >= (3, 10):
+        return entry_points(group=ENTRY_POINT_GROUP)
+    return entry_points().get(ENTRY_POINT_GROUP, [])
+
+
+class GlobalVariables(Mapping):
+    """Read-only mapping of variable names to their values for project at `project_path`.
+
+    Values are computed on first access, names of accessed variables are recorded in `used`.
+    """
+
+    def __init__(self, project_path: Optional[Path] = None):
+        self.project_path = Path(project_path or Path.cwd()).resolve()
+        self.used: Set[str] = set()
+
+    def __getitem__(self, name: str) -> Any:
+        variable = registered_variables()[name]
+        key = (name, self.project_path)
+        if key not in _values:
+            with span(f"variables.{name}"):
+                _values[key] = variable.factory(self.project_path)
+        self.used.add(name)
+        return _values[key]
+
+    def __contains__(self, name: object) -> bool:
+        return name in registered_variables()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(registered_variables())
+
+    def __len__(self) -> int:
+        return len(registered_variables())
+
+    def used_values(self) -> Dict[str, Any]:
+        return {name: self[name] for name in sorted(self.used)}
+
+    def to_readme_string(self) -> str:
+        return "".join(
+            f"{{{{ {variable.name} }}}}: {variable.description}\n"
+            for variable in registered_variables().values()
+        )
+
+
+@register_variable("project_root_basename", "root directory of current project")
+def _project_root_basename(project_path: Path) -> Optional[str]:
+    return get_project_root_basename(project_path)
+
+
+@register_variable("uid", "id of current user")
+def _uid(project_path: Path) -> Optional[int]:
+    return os.getuid() if hasattr(os, "getuid") else None
+
+
+@register_variable("login", "username of current user")
+def _login(project_path: Path) -> Optional[str]:
+    try:
+        return os.getlogin()
+    except OSError:
+        # no controlling terminal, i.e. in containers or CI
+        pass
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return None
+
+
+@register_variable("hostname", "hostname of current machine")
+def _hostname(project_path: Path) -> str:
+    return platform.node()
@@ -0,0 +1,227 @@
+"""Regeneration of devcontainer files whenever any of their inputs changes.
+
+Files are watched with inotify where available (Linux) and by polling their stat otherwise.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from .config import ResolvedConfig
+from .context import get_context
+from .generator import GenerateResult, Generator
+from .settings import Settings
+from .util import FileStat, directory_lock, file_stat
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detects changes of watched files by comparing their stat every `interval` seconds."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self._stats: Dict[Path, FileStat] = {}
+
+    def watch(self, paths: Iterable[Path], stats: Optional[Dict[Path, FileStat]] = None):
+        """Watches `paths` instead of the previously watched files. Paths with stat in `stats`
+        (taken before they were read) are reported if they changed since then, other paths
+        if they change from now on."""
+        stats = stats or {}
+        self._stats = {path: stats[path] if path in stats else file_stat(path) for path in paths}
+
+    def changes(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Waits at most `timeout` seconds (forever if None) for changes of watched files."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, stat in self._stats.items():
+                current = file_stat(path)
+                if current != stat:
+                    self._stats[path] = current
+                    changed.add(path)
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detects changes of watched files with inotify.
+
+    Parent directories are watched instead of the files, so files replaced by editors (written
+    to a temporary file and renamed) are detected as well.
+    """
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: Dict[Path, int] = {}
+        self._watch_directories: Dict[int, Path] = {}
+        self._paths: Set[Path] = set()
+        # paths that changed since their stat passed to `watch`
+        self._pending: Set[Path] = set()
+
+    def watch(self, paths: Iterable[Path], stats: Optional[Dict[Path, FileStat]] = None):
+        """Same as `PollingWatcher.watch`."""
+        stats = stats or {}
+        self._paths = {Path(path).absolute() for path in paths}
+        self._pending = {
+            path for path in self._paths if path in stats and file_stat(path) != stats[path]
+        }
+        directories = {path.parent for path in self._paths}
+        for directory in set(self._directories) - directories:
+            self._libc.inotify_rm_watch(self._fd, self._directories.pop(directory))
+        for directory in directories - set(self._directories):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self._directories[directory] = wd
+                self._watch_directories[wd] = directory
+
+    def changes(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Waits at most `timeout` seconds (forever if None) for changes of watched files."""
+        if self._pending:
+            changed, self._pending = self._pending, set()
+            return changed | {path for path in self._read_events() if path in self._paths}
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return set()
+            changed = {path for path in self._read_events() if path in self._paths}
+            if changed:
+                return changed
+
+    def _read_events(self) -> Iterator[Path]:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            directory = self._watch_directories.get(wd)
+            if directory is not None and name:
+                yield directory / os.fsdecode(name)
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(poll: bool = False):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher()
+
+
+class WatchEvent(NamedTuple):
+    changed: List[Path]
+    duration: float
+    result: Optional[GenerateResult] = None
+    error: Optional[Exception] = None
+
+
+class WatchSession:
+    """Keeps context, config graphs and the last resolved config in memory and regenerates
+    outputs of project in current working directory when their inputs change.
+
+    Only changed configs and configs based on them are parsed again, changes of dockerfiles
+    only re-render outputs from the last resolved config.
+    """
+
+    def __init__(self, templates: Optional[List[str]] = None, settings: Settings = None):
+        self.templates = templates
+        self.settings = settings or Settings()
+        self.context = get_context(self.settings, create_if_not_exist=True)
+        self.generator = Generator(self.context, use_cache=False)
+        self.resolved_config: Optional[ResolvedConfig] = None
+        self.inputs: Set[Path] = set()
+
+    def update(self, changed: Iterable[Path] = ()) -> GenerateResult:
+        changed = {Path(path).absolute() for path in changed}
+        context = get_context(self.settings, create_if_not_exist=True)
+        if context is not self.context:
+            self.context = context
+            self.generator = Generator(context, use_cache=False)
+            self.resolved_config = None
+        elif changed:
+            self._invalidate(changed)
+
+        with directory_lock(Path.cwd()):
+            if self.resolved_config is None:
+                self.resolved_config = self.generator.resolve(self.templates)
+            result = self.generator.write_outputs(self.resolved_config, self.templates)
+        self.inputs = {Path(path).absolute() for path in result.inputs}
+        return result
+
+    def _invalidate(self, changed: Set[Path]):
+        generator = self.generator
+        dockerfiles = set()
+        if self.resolved_config is not None:
+            dockerfiles = {path.absolute() for path in self.resolved_config.dockerfile_sources}
+        if changed <= dockerfiles:
+            return
+
+        self.resolved_config = None
+        global_paths = {path.absolute() for path in generator.global_graph.nodes}
+        if changed & global_paths:
+            generator.global_graph.invalidate(changed)
+        if changed & (global_paths | {generator.defaults.config_path.absolute()}):
+            generator.__dict__.pop("defaults", None)
+        generator.graph.invalidate(changed)
+
+    def run(self, watcher, debounce: float = 0.05) -> Iterator[WatchEvent]:
+        """Generates outputs and then regenerates them after every burst of changes, changes
+        separated by less than `debounce` seconds are handled together."""
+        changed: Set[Path] = set()
+        while True:
+            start = time.perf_counter()
+            # inputs saved while regenerating or while the event is handled differ from stats
+            # taken before they are read, so they are reported by the watcher
+            stats = {path: file_stat(path) for path in self.inputs | changed}
+            try:
+                result = self.update(changed)
+                event = WatchEvent(sorted(changed), time.perf_counter() - start, result)
+            except Exception as e:
+                # keep watching the last known inputs together with the changed files
+                self.resolved_config = None
+                self.inputs |= changed
+                event = WatchEvent(sorted(changed), time.perf_counter() - start, error=e)
+            # new inputs are read by the update, only later changes can be detected
+            stats.update({path: file_stat(path) for path in self.inputs if path not in stats})
+            yield event
+
+            watcher.watch(self.inputs, stats)
+            changed = watcher.changes()
+            while True:
+                more = watcher.changes(timeout=debounce)
+                if not more:
+                    break
+                changed |= more
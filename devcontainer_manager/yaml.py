@@ -1,11 +1,22 @@
 import io
 from pathlib import Path
+from typing import Any, Dict, Optional, Union
 
+import ruamel.yaml
 from ruamel.yaml import YAML
 from ruamel.yaml.comments import CommentedMap
+from ruamel.yaml.constructor import SafeConstructor
 from ruamel.yaml.error import CommentMark
 from ruamel.yaml.tokens import CommentToken
 
+from .exceptions import InvalidArgumentException
+from .merge import RemoveList, ReplaceList
+
+# backends for loading configs - "c" uses libyaml if available, "pure" is pure python,
+# configs are always dumped with round-trip `yaml` as libyaml can't emit its indentation style
+YAML_BACKENDS = ("c", "pure")
+
+# round-trip yaml for dumping (preserves comments added for descriptions)
 yaml = YAML(pure=True)
 yaml.default_flow_style = False
 yaml.width = 4096
@@ -21,6 +32,54 @@ def yaml_to_str(dict):
 yaml.dump_str = yaml_to_str
 
 
+class ConfigConstructor(SafeConstructor):
+    """Safe constructor with tags of lists that change how they are merged with other configs -
+    `!replace` (replace lists of base configs) and `!remove` (remove items from them)."""
+
+    def construct_replace_list(self, node):
+        return ReplaceList(self.construct_sequence(node, deep=True))
+
+    def construct_remove_list(self, node):
+        return RemoveList(self.construct_sequence(node, deep=True))
+
+
+ConfigConstructor.add_constructor("!replace", ConfigConstructor.construct_replace_list)
+ConfigConstructor.add_constructor("!remove", ConfigConstructor.construct_remove_list)
+
+_backend: Optional[str] = None
+_loaders: Dict[str, YAML] = {}
+
+
+def get_backend() -> str:
+    """Returns backend used by `load_str`, `Settings.yaml_backend` by default."""
+    if _backend is None:
+        from .settings import Settings
+
+        set_backend(Settings().yaml_backend)
+    return _backend
+
+
+def set_backend(backend: Optional[str]):
+    """Sets backend used by `load_str`, None resets it to `Settings.yaml_backend`."""
+    global _backend
+    if backend is not None and backend not in YAML_BACKENDS:
+        raise InvalidArgumentException(
+            f"invalid yaml backend '{backend}' - expected one of {', '.join(YAML_BACKENDS)}"
+        )
+    _backend = backend
+
+
+def load_str(content: Union[str, bytes], backend: Optional[str] = None) -> Any:
+    """Loads plain data (without comments) from yaml `content` using safe loader."""
+    backend = backend or get_backend()
+    loader = _loaders.get(backend)
+    if loader is None:
+        pure = backend == "pure" or not ruamel.yaml.__with_libyaml__
+        loader = _loaders[backend] = YAML(typ="safe", pure=pure)
+        loader.Constructor = ConfigConstructor
+    return loader.load(content)
+
+
 def represent_none(representer, _):
     return representer.represent_scalar("tag:yaml.org,2002:null", "")
 